@@ -0,0 +1,217 @@
+"""Benchmark every team formation solver on seeded synthetic rosters.
+
+Usage:
+    python benchmark.py                                 # full grid, results in benchmark_results.json
+    python benchmark.py --sizes 10 50 --teams 2 4 --solvers EpsilonGreedy GeneticAlgorithm
+    python benchmark.py --time-limit 1.0 --output before.json
+    python benchmark.py --no-bound-stop --distributions even --objective 1 0.1 0.5
+
+Each case is one (roster size, team count, rating distribution, solver) and
+reports wall-clock time, evaluations per second, time per loop phase
+(select, evaluate, apply), peak memory and the best balance score. Time is measured on a plain run; peak memory comes from a
+second run with the same seed under tracemalloc, which would otherwise
+slow the timed run down. Both runs use the same seed, so their splits match.
+
+By default a run stops once it reaches the roster's lower bound. On float
+ratings most solvers get there within a few iterations, so to compare them
+use --no-bound-stop (every run spends its whole budget), the even
+distribution, or an --objective with variance or parity weights, whose
+bound is rarely reachable.
+"""
+
+import argparse
+import json
+import platform
+import random
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from models.bandits import EpsilonGreedy, UCB, ThompsonSampling
+from models.base import TeamFormulator
+from models.evolution import GeneticAlgorithm
+from models.league import LeagueSearch
+from models.local_search import SimulatedAnnealing, TabuSearch
+from models.objectives import Objective
+from models.telemetry import SolverTelemetry
+
+POSITIONS = ["forward", "midfielder", "defender"]
+
+SOLVERS = {
+    "EpsilonGreedy": (EpsilonGreedy, {"epsilon": 0.1}),
+    "UCB": (UCB, {"exploration_factor": 1.0}),
+    "ThompsonSampling": (ThompsonSampling, {"alpha": 1, "beta": 1}),
+    "GeneticAlgorithm": (GeneticAlgorithm, {"population_size": 30, "mutation_rate": 0.05}),
+    "SimulatedAnnealing": (SimulatedAnnealing, {"schedule": "geometric", "cooling_rate": 0.995}),
+    "TabuSearch": (TabuSearch, {"sample_size": 200}),
+    "LeagueSearch": (LeagueSearch, {"neighbors": 16, "explore": 4}),
+}
+
+DISTRIBUTIONS = ["uniform", "normal", "skewed", "specialist", "even"]
+
+
+def make_roster(num_players, distribution="uniform", seed=0, positions=POSITIONS):
+    """Synthetic {name: {position: rating}} roster on the 0-10 scale, reproducible from the seed.
+
+    uniform: ratings spread evenly. normal: most players average, few stars.
+    skewed: a long tail of weak players. specialist: one strong position per
+    player, the rest near zero. even: uniform, shifted so every position has
+    the same roster total; the lower bound is then about zero, and only a
+    split with every team exactly balanced reaches it.
+    """
+    rng = np.random.default_rng(seed)
+    shape = (num_players, len(positions))
+    if distribution == "uniform":
+        ratings = rng.uniform(0, 10, shape)
+    elif distribution == "normal":
+        ratings = rng.normal(6, 1.5, shape)
+    elif distribution == "skewed":
+        ratings = 10 * rng.beta(2, 5, shape)
+    elif distribution == "specialist":
+        ratings = rng.uniform(0, 2, shape)
+        best = rng.integers(0, len(positions), num_players)
+        ratings[np.arange(num_players), best] = rng.uniform(6, 10, num_players)
+    elif distribution == "even":
+        ratings = rng.uniform(1, 9, shape)
+        ratings += ratings.mean() - ratings.mean(axis=0)
+    else:
+        raise ValueError(f"Unknown distribution: {distribution}")
+
+    # Averages of integer ratings, like the ones stored in the database
+    ratings = np.round(np.clip(ratings, 0, 10), 2)
+    return {
+        f"Player {i + 1}": dict(zip(positions, map(float, row))) for i, row in enumerate(ratings)
+    }
+
+
+def balance_score(players, teams, objective=None):
+    # Scored by the same helper as the app's results, so the two can't drift apart
+    return float(TeamFormulator(players).score_split(teams, objective))
+
+
+def run_case(
+    solver, players, num_teams, iterations, seed, time_limit=None, memory=True, stop_at_bound=True, objective=None
+):
+    algorithm_class, params = SOLVERS[solver]
+
+    def solve(telemetry=None):
+        random.seed(seed)
+        np.random.seed(seed)
+        algorithm = algorithm_class(players, iterations, num_teams=num_teams, objective=objective, **params)
+        algorithm.set_budget(time_limit, stop_at_bound=stop_at_bound)
+        algorithm.set_telemetry(telemetry)
+        return algorithm, algorithm.run()
+
+    telemetry = SolverTelemetry()
+    started = time.perf_counter()
+    algorithm, teams = solve(telemetry)
+    elapsed = time.perf_counter() - started
+    # Candidate splits scored, including the bulk scoring of epsilon-greedy's exploit step
+    count = telemetry.evaluations
+
+    peak_memory = None
+    if memory:
+        tracemalloc.start()
+        solve()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "seconds": elapsed,
+        "iterations": algorithm.budget.iteration,
+        "evaluations": count,
+        "evaluations_per_second": count / elapsed if elapsed > 0 else None,
+        "rejected": telemetry.rejected,
+        "acceptance_rate": telemetry.acceptance_rate,
+        "peak_memory_bytes": peak_memory,
+        "balance_score": balance_score(players, teams, objective),
+        "lower_bound": float(algorithm.state.lower_bound()),
+        "stop_reason": algorithm.budget.stop_reason,
+        "timings": telemetry.timings,
+        "trajectory": telemetry.trajectory,
+    }
+
+
+def run_benchmark(
+    sizes, teams, distributions, solvers, iterations, seed, time_limit=None, memory=True, stop_at_bound=True, objective=None
+):
+    results = []
+    for num_players in sizes:
+        for distribution in distributions:
+            players = make_roster(num_players, distribution, seed)
+            for num_teams in teams:
+                if num_teams * 2 > num_players:
+                    # Every team needs at least two players for a swap to exist
+                    continue
+                for solver in solvers:
+                    result = run_case(
+                        solver, players, num_teams, iterations, seed, time_limit, memory, stop_at_bound, objective
+                    )
+                    case = {
+                        "solver": solver,
+                        "num_players": num_players,
+                        "num_teams": num_teams,
+                        "distribution": distribution,
+                        "seed": seed,
+                        **result,
+                    }
+                    results.append(case)
+                    print(
+                        f"{solver:>18} n={num_players:<5} k={num_teams:<3} {distribution:<10} "
+                        f"{result['seconds']:8.3f}s {result['evaluations_per_second'] or 0:12.0f} evals/s "
+                        f"score={result['balance_score']:.2f} ({result['stop_reason']})"
+                    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200, 1000])
+    parser.add_argument("--teams", type=int, nargs="+", default=[2, 4, 8, 16])
+    parser.add_argument("--distributions", nargs="+", choices=DISTRIBUTIONS, default=DISTRIBUTIONS)
+    parser.add_argument("--solvers", nargs="+", choices=list(SOLVERS), default=list(SOLVERS))
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds per run, replaces --iterations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--no-bound-stop", action="store_true", help="don't stop a run at the roster's lower bound")
+    parser.add_argument(
+        "--objective",
+        type=float,
+        nargs=3,
+        metavar=("SPREAD", "VARIANCE", "PARITY"),
+        default=None,
+        help="objective weights, see models.objectives.Objective",
+    )
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        args.sizes,
+        args.teams,
+        args.distributions,
+        args.solvers,
+        args.iterations,
+        args.seed,
+        args.time_limit,
+        not args.no_memory,
+        not args.no_bound_stop,
+        Objective(*args.objective) if args.objective else None,
+    )
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.platform(),
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
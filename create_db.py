@@ -1,13 +1,11 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from db.entities import Base, Position, Question, Player, Rating, Team, Match, PlayerTeam, Goal
+from db.aggregates import rebuild_rating_aggregates, record_ratings
+from db.entities import Base, Position, Question, Player, Rating, RatingAggregate, Team, Match, PlayerTeam, Goal
+from db.session import get_engine, session_scope
+import argparse
 import json
 
-engine = create_engine("sqlite:///rating.db")
-
-# Create a session
-Session = sessionmaker(bind=engine)
-session = Session()
+# The shared, tuned engine; creating it also creates missing tables and rating averages
+engine = get_engine()
 
 def drop_all_tables(engine):
     Base.metadata.drop_all(engine)
@@ -59,12 +57,14 @@ def insert_players(session, drop_existing=False):
 
 def populate_ratings(session, clear_existing=False):
     if clear_existing:
+        session.query(RatingAggregate).delete()
         session.query(Rating).delete()
         session.commit()
     
     with open("data/initial_rating.json", "r") as file:
         data = json.load(file)
     
+    added = []
     for player_name, ratings in data.items():
         player = session.query(Player).filter_by(name=player_name).first()
         if player:
@@ -78,20 +78,36 @@ def populate_ratings(session, clear_existing=False):
                         score=score
                     )
                     session.add(rating)
+                    added.append(rating)
                 else:
                     print(f"Question not found in the database: {question_content}")
         else:
             print(f"Player not found in the database: {player_name}")
+    # Committed together with the ratings
+    record_ratings(session, added)
+    session.commit()
+
+def rebuild_aggregates(session):
+    # Repair the rating averages from the full ratings history
+    RatingAggregate.__table__.create(session.get_bind(), checkfirst=True)
+    rebuild_rating_aggregates(session)
     session.commit()
 
 def main():
-    # drop_all_tables(engine)
-    # Base.metadata.create_all(engine)
-    # prepopulate_positions(session)
-    # populate_questions(session)
-    insert_players(session, drop_existing=True)
-    populate_ratings(session, clear_existing=True)
-    session.close()
+    parser = argparse.ArgumentParser(description="Create and fill rating.db")
+    parser.add_argument("--rebuild-aggregates", action="store_true", help="only recompute the rating averages")
+    args = parser.parse_args()
+    with session_scope() as session:
+        if args.rebuild_aggregates:
+            rebuild_aggregates(session)
+            return
+
+        # drop_all_tables(engine)
+        # Base.metadata.create_all(engine)
+        # prepopulate_positions(session)
+        # populate_questions(session)
+        insert_players(session, drop_existing=True)
+        populate_ratings(session, clear_existing=True)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from sqlalchemy import func
+
+from db.entities import Rating, RatingAggregate
+
+
+def record_ratings(session, ratings):
+    """Add new Rating rows to their (player, position) aggregates, in the caller's transaction.
+
+    Call it with the ratings being added, before the commit that adds them,
+    so the aggregates and the ratings history always change together.
+    """
+    totals = {}
+    for rating in ratings:
+        if rating.score is None:
+            continue
+        key = (rating.player_id, rating.position_id)
+        total, count = totals.get(key, (0.0, 0))
+        totals[key] = (total + rating.score, count + 1)
+
+    now = datetime.now()
+    for (player_id, position_id), (total, count) in totals.items():
+        # Increment in SQL, so concurrent submissions for the same player never lose an update
+        updated = (
+            session.query(RatingAggregate)
+            .filter_by(player_id=player_id, position_id=position_id)
+            .update(
+                {
+                    RatingAggregate.sum: RatingAggregate.sum + total,
+                    RatingAggregate.count: RatingAggregate.count + count,
+                    RatingAggregate.last_updated: now,
+                },
+                synchronize_session=False,
+            )
+        )
+        if not updated:
+            session.add(
+                RatingAggregate(
+                    player_id=player_id, position_id=position_id, sum=total, count=count, last_updated=now
+                )
+            )
+
+
+def rebuild_rating_aggregates(session):
+    """Recompute every aggregate from the full ratings history, in the caller's transaction."""
+    session.query(RatingAggregate).delete(synchronize_session=False)
+    grouped = (
+        session.query(Rating.player_id, Rating.position_id, func.sum(Rating.score), func.count(Rating.score))
+        .filter(Rating.player_id.isnot(None), Rating.position_id.isnot(None), Rating.score.isnot(None))
+        .group_by(Rating.player_id, Rating.position_id)
+    )
+    now = datetime.now()
+    session.add_all(
+        RatingAggregate(player_id=player_id, position_id=position_id, sum=total, count=count, last_updated=now)
+        for player_id, position_id, total, count in grouped
+    )
+
+
+def ensure_rating_aggregates(session):
+    # Create the table on databases from before it existed and fill it once from the ratings history
+    RatingAggregate.__table__.create(session.get_bind(), checkfirst=True)
+    if session.query(RatingAggregate.player_id).first() is None and session.query(Rating.id).first() is not None:
+        rebuild_rating_aggregates(session)
+        session.commit()
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 
@@ -48,8 +50,25 @@ class Rating(Base):
     position = relationship(
         "Position", back_populates="ratings"
     )  # Link back to position
-    question_id = Column(Integer, ForeignKey("questions.id"))  # ForeignKey to questions
+    question_id = Column(Integer, ForeignKey("questions.id"), index=True)  # ForeignKey to questions
     question = relationship("Question")  # Link ratings to specific questions
+    __table_args__ = (
+        # Per-player and per-(player, position) lookups; score included so rebuilding the averages reads only the index
+        Index("ix_ratings_player_position_score", "player_id", "position_id", "score"),
+        Index("ix_ratings_position_id", "position_id"),
+    )
+
+
+class RatingAggregate(Base):
+    # Running sum and count of each player's ratings per position, kept by db.aggregates
+    __tablename__ = "rating_aggregates"
+    player_id = Column(Integer, ForeignKey("players.id"), primary_key=True)
+    position_id = Column(Integer, ForeignKey("positions.id"), primary_key=True)
+    sum = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+    last_updated = Column(DateTime, nullable=False, default=datetime.now)
+    player = relationship("Player")
+    position = relationship("Position")
 
 
 class Team(Base):
@@ -63,23 +82,28 @@ class Team(Base):
 class Match(Base):
     __tablename__ = "matches"
     id = Column(Integer, primary_key=True)
-    date = Column(DateTime, nullable=False)
-    team_id = Column(Integer, ForeignKey("teams.id"))
+    date = Column(DateTime, nullable=False, index=True)  # Latest match first, date ranges
+    team_id = Column(Integer, ForeignKey("teams.id"), index=True)
     team = relationship("Team", back_populates="matches", foreign_keys=[team_id])
-    opponent_team_id = Column(Integer, ForeignKey("teams.id"))
+    opponent_team_id = Column(Integer, ForeignKey("teams.id"), index=True)
     opponent_team = relationship("Team", foreign_keys=[opponent_team_id])
     goals = relationship("Goal", back_populates="match")  # Link matches to goals
+    player_teams = relationship("PlayerTeam", back_populates="match")  # Line-ups of both teams
 
 
 class PlayerTeam(Base):
     __tablename__ = "player_teams"
     id = Column(Integer, primary_key=True)
-    player_id = Column(Integer, ForeignKey("players.id"))
-    team_id = Column(Integer, ForeignKey("teams.id"))
+    player_id = Column(Integer, ForeignKey("players.id"), index=True)
+    team_id = Column(Integer, ForeignKey("teams.id"), index=True)
     match_id = Column(Integer, ForeignKey("matches.id"))
     player = relationship("Player", back_populates="player_teams")
     team = relationship("Team", back_populates="player_teams")
-    match = relationship("Match")
+    match = relationship("Match", back_populates="player_teams")
+    __table_args__ = (
+        # A match's line-ups, per team
+        Index("ix_player_teams_match_team", "match_id", "team_id"),
+    )
 
 
 class Goal(Base):
@@ -87,7 +111,11 @@ class Goal(Base):
     id = Column(Integer, primary_key=True)
     match_id = Column(Integer, ForeignKey("matches.id"))
     match = relationship("Match", back_populates="goals")
-    scorer_id = Column(Integer, ForeignKey("players.id"))
+    scorer_id = Column(Integer, ForeignKey("players.id"), index=True)  # Top scorers
     scorer = relationship("Player", foreign_keys=[scorer_id], back_populates="goals")
-    assist_id = Column(Integer, ForeignKey("players.id"), nullable=True)
-    assist = relationship("Player", foreign_keys=[assist_id], back_populates="assists")
\ No newline at end of file
+    assist_id = Column(Integer, ForeignKey("players.id"), nullable=True, index=True)  # Top assisters
+    assist = relationship("Player", foreign_keys=[assist_id], back_populates="assists")
+    __table_args__ = (
+        # A match's goals, and the goals of its players
+        Index("ix_goals_match_scorer", "match_id", "scorer_id"),
+    )
\ No newline at end of file
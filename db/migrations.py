@@ -0,0 +1,44 @@
+from sqlalchemy import text
+
+from db.entities import Base
+
+
+def add_indexes(connection):
+    # Tables created before their indexes were declared; create_all skips existing tables, indexes included
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    if connection.dialect.name == "sqlite":
+        # Row counts per index, so the query planner knows which one to pick
+        connection.execute(text("ANALYZE"))
+
+
+# Applied in order; a database at version v has run the first v of them
+MIGRATIONS = [
+    add_indexes,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_version(connection):
+    if connection.dialect.name != "sqlite":
+        return 0
+    return connection.execute(text("PRAGMA user_version")).scalar()
+
+
+def upgrade(engine):
+    """Bring an existing database up to SCHEMA_VERSION in place; returns the migrations that ran.
+
+    The version lives in SQLite's user_version header field. Other databases
+    keep no version and run every migration each time, which is why each one
+    must be safe to repeat.
+    """
+    with engine.begin() as connection:
+        version = get_version(connection)
+        pending = MIGRATIONS[version:]
+        for migration in pending:
+            migration(connection)
+        if pending and connection.dialect.name == "sqlite":
+            connection.execute(text(f"PRAGMA user_version={SCHEMA_VERSION}"))
+    return [migration.__name__ for migration in pending]
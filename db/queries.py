@@ -0,0 +1,86 @@
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
+
+from db.entities import Goal, Match, Player, PlayerTeam, Position, RatingAggregate
+
+
+def get_position_names(session):
+    """Lowercased position names in table order, the keys of every player's rating dict."""
+    return [name.lower() for (name,) in session.query(Position.name).order_by(Position.id)]
+
+
+def get_rating_matrix(session):
+    """Average rating of every player at every position, read from the rating aggregates.
+
+    Returns (player_names, position_names, averages): players and positions
+    in table order and a players x positions float array, 0 where a player
+    has no rating at a position, the layout models.state.TeamState takes.
+    The cost depends on players x positions, not on the ratings history;
+    see db.aggregates.
+    """
+    players = session.query(Player.id, Player.name).order_by(Player.id).all()
+    positions = session.query(Position.id, Position.name).order_by(Position.id).all()
+    player_rows = {player_id: row for row, (player_id, _) in enumerate(players)}
+    position_columns = {position_id: column for column, (position_id, _) in enumerate(positions)}
+
+    averages = np.zeros((len(players), len(positions)))
+    aggregates = session.query(
+        RatingAggregate.player_id, RatingAggregate.position_id, RatingAggregate.sum, RatingAggregate.count
+    )
+    for player_id, position_id, total, count in aggregates:
+        if player_id in player_rows and position_id in position_columns and count:
+            averages[player_rows[player_id], position_columns[position_id]] = total / count
+    return [name for _, name in players], [name for _, name in positions], averages
+
+
+def get_latest_match_split(session):
+    """Player names per team in the most recent match, or None when no match has been recorded."""
+    match = session.query(Match).order_by(Match.date.desc(), Match.id.desc()).first()
+    if match is None:
+        return None
+
+    rows = (
+        session.query(PlayerTeam.team_id, Player.name)
+        .join(Player, Player.id == PlayerTeam.player_id)
+        .filter(PlayerTeam.match_id == match.id)
+        .all()
+    )
+    teams = {match.team_id: [], match.opponent_team_id: []}
+    for team_id, name in rows:
+        teams.setdefault(team_id, []).append(name)
+    return [names for names in teams.values() if names]
+
+
+def get_match_months(session):
+    """(first day of the month, match count) for every month with a match, newest first.
+
+    The database groups and counts the matches per month, so only one row
+    per month reaches Python however long the history is.
+    """
+    month = func.strftime("%Y-%m", Match.date)
+    rows = session.query(month, func.count(Match.id)).group_by(month).order_by(month.desc())
+    return [(datetime.strptime(key, "%Y-%m"), count) for key, count in rows]
+
+
+def get_match_history(session, start, end):
+    """Matches dated in [start, end), newest first, with everything the history page shows loaded.
+
+    Teams, line-ups with their players and goals with scorer and assister
+    come in with a fixed handful of statements however many matches there
+    are, so reading them afterwards never queries the database again.
+    """
+    return (
+        session.query(Match)
+        .filter(Match.date >= start, Match.date < end)
+        .order_by(Match.date.desc(), Match.id.desc())
+        .options(
+            joinedload(Match.team),
+            joinedload(Match.opponent_team),
+            selectinload(Match.player_teams).joinedload(PlayerTeam.player),
+            selectinload(Match.goals).options(joinedload(Goal.scorer), joinedload(Goal.assist)),
+        )
+        .all()
+    )
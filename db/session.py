@@ -0,0 +1,82 @@
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from db.aggregates import ensure_rating_aggregates
+from db.entities import Base
+from db.migrations import upgrade
+
+DATABASE_URL = "sqlite:///rating.db"
+
+# Set on every new SQLite connection
+SQLITE_PRAGMAS = {
+    # Readers no longer block the writer, and the writer no longer blocks readers
+    "journal_mode": "WAL",
+    # Safe with WAL: a crash can only lose the last commits, never corrupt the file
+    "synchronous": "NORMAL",
+    # Page cache in KiB when negative: 64 MiB
+    "cache_size": -65536,
+    # Memory-mapped reads: 256 MiB
+    "mmap_size": 268435456,
+    # Wait up to 5 s for another writer instead of failing with "database is locked"
+    "busy_timeout": 5000,
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def init_schema(engine):
+    # Create missing tables, migrate existing ones and fill derived ones; safe to run on an existing database
+    Base.metadata.create_all(engine)
+    upgrade(engine)
+    with Session(bind=engine) as session:
+        ensure_rating_aggregates(session)
+
+
+def get_engine(url=DATABASE_URL):
+    """The process-wide engine for `url`, created, tuned and schema-checked on first use.
+
+    Streamlit reruns every page script on each interaction, but modules are
+    imported once per process, so every page and rerun shares this engine and
+    its connection pool.
+    """
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = create_engine(url)
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", _set_sqlite_pragmas)
+            init_schema(engine)
+            _engines[url] = engine
+        return engine
+
+
+@contextmanager
+def session_scope(url=DATABASE_URL):
+    """A fresh session for one script run or command.
+
+    Every page runs its whole script inside one, so each Streamlit rerun
+    gets its own session. Commits when the block ends normally, rolls back
+    when it raises (including Streamlit's stop and rerun signals, so a
+    failed save is undone) and always closes, so no transaction or stale
+    identity map outlives the run.
+    """
+    session = Session(bind=get_engine(url))
+    try:
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        session.close()
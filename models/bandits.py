@@ -1,276 +1,230 @@
 from models.base import BanditAlgorithm, EvolutionaryAlgorithm
 import random
 import numpy as np
-import math
 
 
 class EpsilonGreedy(BanditAlgorithm):
-    def __init__(self, players, iterations, epsilon=0.1, num_teams=2):
-        super().__init__(players, iterations)
+    def __init__(
+        self,
+        players,
+        iterations,
+        epsilon=0.1,
+        num_teams=2,
+        constraints=None,
+        initializer=None,
+        objective=None,
+        positions=None,
+    ):
+        super().__init__(players, iterations, num_teams, constraints, initializer, objective, positions)
         self.epsilon = epsilon
-        self.num_teams = num_teams
-        self.teams = [{} for _ in range(num_teams)]
-
-    def initialize_teams(self):
-        # Initialize players randomly across teams without duplication
-        players = list(self.players.items())
-        random.shuffle(players)
-        for i, player in enumerate(players):
-            self.teams[i % self.num_teams][player[0]] = player[1]
 
     def select_players_to_swap(self):
         if random.random() < self.epsilon:
             # Explore: select random players to swap
-            team1, team2 = random.sample(range(self.num_teams), 2)
-            player1 = random.choice(list(self.teams[team1].keys()))
-            player2 = random.choice(list(self.teams[team2].keys()))
-        else:
-            # Exploit: select the best swap based on balance score
-            valid_swaps = self.get_valid_swaps()
-            if valid_swaps:
-                team1, team2, player1, player2, _ = min(valid_swaps, key=lambda x: x[4])
-            else:
-                team1, team2 = random.sample(range(self.num_teams), 2)
-                player1 = random.choice(list(self.teams[team1].keys()))
-                player2 = random.choice(list(self.teams[team2].keys()))
-
-        return team1, team2, player1, player2
-
-    def get_valid_swaps(self):
-        valid_swaps = []
-        for i, team1 in enumerate(self.teams):
-            for j, team2 in enumerate(self.teams):
-                if i >= j:
-                    continue
-                team1_keys = list(team1.keys())  # Convert to list to avoid modifying during iteration
-                team2_keys = list(team2.keys())  # Convert to list to avoid modifying during iteration
-                for player1 in team1_keys:
-                    for player2 in team2_keys:
-                        new_balance = self.evaluate_swap(i, j, player1, player2)
-                        if new_balance is not None:
-                            valid_swaps.append((i, j, player1, player2, new_balance))
-        return valid_swaps
+            return self.random_swap()
+
+        # Exploit: select the best swap based on balance score
+        scores = self.score_all_swaps()
+        player1, player2 = np.unravel_index(np.argmin(scores), scores.shape)
+        if np.isinf(scores[player1, player2]):
+            return self.random_swap()
+        return self.state.assignment[player1], self.state.assignment[player2], player1, player2
 
     def run(self):
         self.initialize_teams()
-        best_balance = float("inf")
-        self.best_teams = [dict(team) for team in self.teams]
+        best_balance = self.current_balance()
+        self.best_assignment = self.state.assignment.copy()
 
-        for _ in range(self.iterations):
+        budget = self.start_budget()
+        telemetry = self.start_telemetry()
+        while budget.step(best_balance):
             team1_idx, team2_idx, player1, player2 = self.select_players_to_swap()
+            if telemetry is not None:
+                telemetry.lap("select")
+
+            new_balance = self.evaluate_swap(team1_idx, team2_idx, player1, player2)
+            if telemetry is not None:
+                telemetry.lap("evaluate")
+            if new_balance is None:
+                # Skip the swap if it violates the constraint
+                if telemetry is not None:
+                    telemetry.record(best_balance, rejected=1)
+                continue
+
+            # Only apply the swap if it improves the balance
+            accepted = new_balance < best_balance
+            if accepted:
+                self.swap_players(team1_idx, team2_idx, player1, player2)
+                best_balance = new_balance
+                self.best_assignment = self.state.assignment.copy()
+            if telemetry is not None:
+                telemetry.lap("apply")
+                telemetry.record(best_balance, accepted=accepted)
 
-            # Store the current teams before swapping
-            current_teams = [dict(team) for team in self.teams]
+        return self.get_best_teams()
 
-            self.swap_players(team1_idx, team2_idx, player1, player2)
 
-            if any(self.has_two_max_rated_players(team) for team in self.teams):
-                # Revert the swap if it violates the constraint
-                self.teams = current_teams
-                continue
+class SwapArms:
+    """Arm statistics for every (player1, player2) swap, indexed by player rows.
 
-            new_balance = sum(self.calculate_balance_score(team) for team in self.teams)
+    The table is sized once from the roster, so memory stays flat however
+    many iterations run. An arm is playable while player1 sits on a lower
+    team index than player2, matching the old (i < j) team loops.
+    """
 
-            if new_balance < best_balance:
-                best_balance = new_balance
-                self.best_teams = [dict(team) for team in self.teams]
-            else:
-                # Revert the swap if it doesn't improve the balance
-                self.teams = current_teams
+    def __init__(self, num_players):
+        self.counts = np.zeros((num_players, num_players))
+        self.rewards = np.zeros((num_players, num_players))
+        self.total = 0
 
-        return self.best_teams
+    def playable(self, assignment):
+        return assignment[:, None] < assignment[None, :]
 
-    def swap_players(self, team1_idx, team2_idx, player1, player2):
-        self.teams[team1_idx][player1], self.teams[team2_idx][player2] = (
-            self.teams[team2_idx].pop(player2),
-            self.teams[team1_idx].pop(player1),
-        )
+    def update(self, player1, player2, reward):
+        self.counts[player1, player2] += 1
+        self.rewards[player1, player2] += reward
+        self.total += 1
 
 
 class UCB(BanditAlgorithm):
-    def __init__(self, players, iterations, exploration_factor=1.0, num_teams=2):
-        super().__init__(players, iterations)
+    def __init__(
+        self,
+        players,
+        iterations,
+        exploration_factor=1.0,
+        num_teams=2,
+        constraints=None,
+        initializer=None,
+        objective=None,
+        positions=None,
+    ):
+        super().__init__(players, iterations, num_teams, constraints, initializer, objective, positions)
         self.exploration_factor = exploration_factor
-        self.num_teams = num_teams
-        self.teams = [{} for _ in range(num_teams)]
-        self.swap_counts = {}
-        self.swap_rewards = {}
-
-    def initialize_teams(self):
-        # Initialize players randomly across teams without duplication
-        players = list(self.players.items())
-        random.shuffle(players)
-        for i, player in enumerate(players):
-            self.teams[i % self.num_teams][player[0]] = player[1]
+        self.arms = None
 
     def select_players_to_swap(self):
-        team1_players = list(self.teams)
-        total_count = sum(self.swap_counts.values())
-
-        # Calculate UCB scores for each swap
-        ucb_scores = {}
-
-        for i in range(self.num_teams):
-            for j in range(i + 1, self.num_teams):
-                for player1 in self.teams[i].keys():
-                    for player2 in self.teams[j].keys():
-                        swap = (i, j, player1, player2)
-                        if swap not in self.swap_counts:
-                            self.swap_counts[swap] = 0
-                            self.swap_rewards[swap] = 0
-
-                        count = self.swap_counts[swap]
-                        reward = self.swap_rewards[swap]
-                        if count == 0:
-                            ucb_score = float("inf")
-                        else:
-                            ucb_score = reward / count + self.exploration_factor * math.sqrt(
-                                math.log(total_count) / count
-                            )
-                        ucb_scores[swap] = ucb_score
+        # Calculate UCB scores for every playable swap at once
+        counts = self.arms.counts
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ucb_scores = self.arms.rewards / counts + self.exploration_factor * np.sqrt(
+                np.log(self.arms.total) / counts
+            )
+        ucb_scores[counts == 0] = np.inf
+        ucb_scores[~self.arms.playable(self.state.assignment)] = -np.inf
 
         # Select the swap with the highest UCB score
-        if ucb_scores:
-            best_swap = max(ucb_scores, key=ucb_scores.get)
-            team1, team2, player1, player2 = best_swap
-        else:
-            team1, team2 = random.sample(range(self.num_teams), 2)
-            player1 = random.choice(list(self.teams[team1].keys()))
-            player2 = random.choice(list(self.teams[team2].keys()))
-
-        return team1, team2, player1, player2
+        player1, player2 = np.unravel_index(np.argmax(ucb_scores), ucb_scores.shape)
+        if ucb_scores[player1, player2] == -np.inf:
+            return self.random_swap()
+        return self.state.assignment[player1], self.state.assignment[player2], player1, player2
 
     def update_swap_stats(self, team1_idx, team2_idx, player1, player2, reward):
-        swap = (team1_idx, team2_idx, player1, player2)
-        self.swap_counts[swap] += 1
-        self.swap_rewards[swap] += reward
+        self.arms.update(player1, player2, reward)
 
     def run(self):
         self.initialize_teams()
-        best_balance = float("inf")
-        self.best_teams = [dict(team) for team in self.teams]
+        self.arms = SwapArms(self.state.num_players)
+        best_balance = self.current_balance()
+        self.best_assignment = self.state.assignment.copy()
 
-        for _ in range(self.iterations):
+        budget = self.start_budget()
+        telemetry = self.start_telemetry()
+        while budget.step(best_balance):
             team1_idx, team2_idx, player1, player2 = self.select_players_to_swap()
+            if telemetry is not None:
+                telemetry.lap("select")
 
-            # Store the current teams before swapping
-            current_teams = [dict(team) for team in self.teams]
+            new_balance = self.evaluate_swap(team1_idx, team2_idx, player1, player2)
+            if telemetry is not None:
+                telemetry.lap("evaluate")
 
-            self.swap_players(team1_idx, team2_idx, player1, player2)
-
-            if any(self.has_two_max_rated_players(team) for team in self.teams):
-                # Revert the swap if it violates the constraint
-                self.teams = current_teams
+            accepted = False
+            if new_balance is None:
+                # Skip the swap if it violates the constraint
                 reward = 0
             else:
-                new_balance = sum(self.calculate_balance_score(team) for team in self.teams)
                 reward = -new_balance  # Negative reward to minimize balance score
 
-                if new_balance < best_balance:
+                # Only apply the swap if it improves the balance
+                accepted = new_balance < best_balance
+                if accepted:
+                    self.swap_players(team1_idx, team2_idx, player1, player2)
                     best_balance = new_balance
-                    self.best_teams = [dict(team) for team in self.teams]
-                else:
-                    # Revert the swap if it doesn't improve the balance
-                    self.teams = current_teams
+                    self.best_assignment = self.state.assignment.copy()
 
             self.update_swap_stats(team1_idx, team2_idx, player1, player2, reward)
+            if telemetry is not None:
+                telemetry.lap("apply")
+                telemetry.record(best_balance, rejected=new_balance is None, accepted=accepted)
 
-        return self.best_teams
-
-    def swap_players(self, team1_idx, team2_idx, player1, player2):
-        self.teams[team1_idx][player1], self.teams[team2_idx][player2] = (
-            self.teams[team2_idx].pop(player2),
-            self.teams[team1_idx].pop(player1),
-        )
+        return self.get_best_teams()
 
 
 class ThompsonSampling(BanditAlgorithm):
-    def __init__(self, players, iterations, alpha=1, beta=1, num_teams=2):
-        super().__init__(players, iterations)
+    def __init__(
+        self,
+        players,
+        iterations,
+        alpha=1,
+        beta=1,
+        num_teams=2,
+        constraints=None,
+        initializer=None,
+        objective=None,
+        positions=None,
+    ):
+        super().__init__(players, iterations, num_teams, constraints, initializer, objective, positions)
         self.alpha = alpha
         self.beta = beta
-        self.num_teams = num_teams
-        self.teams = [{} for _ in range(num_teams)]
-        self.swap_successes = {}
-        self.swap_failures = {}
-
-    def initialize_teams(self):
-        # Initialize players randomly across teams without duplication
-        players = list(self.players.items())
-        random.shuffle(players)
-        for i, player in enumerate(players):
-            self.teams[i % self.num_teams][player[0]] = player[1]
+        self.arms = None
 
     def select_players_to_swap(self):
-        thompson_scores = {}
-
-        for i in range(self.num_teams):
-            for j in range(i + 1, self.num_teams):
-                for player1 in self.teams[i].keys():
-                    for player2 in self.teams[j].keys():
-                        swap = (i, j, player1, player2)
-                        if swap not in self.swap_successes:
-                            self.swap_successes[swap] = 0
-                            self.swap_failures[swap] = 0
-
-                        successes = self.swap_successes[swap]
-                        failures = self.swap_failures[swap]
-                        thompson_score = np.random.beta(self.alpha + successes, self.beta + failures)
-                        thompson_scores[swap] = thompson_score
+        # One batched Beta draw over the playable swaps; rewards hold the successes
+        player1, player2 = np.nonzero(self.arms.playable(self.state.assignment))
+        if len(player1) == 0:
+            return self.random_swap()
 
-        # Select the swap with the highest Thompson Sampling score
-        if thompson_scores:
-            best_swap = max(thompson_scores, key=thompson_scores.get)
-            team1, team2, player1, player2 = best_swap
-        else:
-            team1, team2 = random.sample(range(self.num_teams), 2)
-            player1 = random.choice(list(self.teams[team1].keys()))
-            player2 = random.choice(list(self.teams[team2].keys()))
+        successes = self.arms.rewards[player1, player2]
+        failures = self.arms.counts[player1, player2] - successes
+        thompson_scores = np.random.beta(self.alpha + successes, self.beta + failures)
 
-        return team1, team2, player1, player2
+        # Select the swap with the highest Thompson Sampling score
+        best = np.argmax(thompson_scores)
+        player1, player2 = player1[best], player2[best]
+        return self.state.assignment[player1], self.state.assignment[player2], player1, player2
 
     def update_swap_stats(self, team1_idx, team2_idx, player1, player2, success):
-        swap = (team1_idx, team2_idx, player1, player2)
-        if success:
-            self.swap_successes[swap] += 1
-        else:
-            self.swap_failures[swap] += 1
+        self.arms.update(player1, player2, int(success))
 
     def run(self):
         self.initialize_teams()
-        best_balance = float("inf")
-        self.best_teams = [dict(team) for team in self.teams]
+        self.arms = SwapArms(self.state.num_players)
+        best_balance = self.current_balance()
+        self.best_assignment = self.state.assignment.copy()
 
-        for _ in range(self.iterations):
+        budget = self.start_budget()
+        telemetry = self.start_telemetry()
+        while budget.step(best_balance):
             team1_idx, team2_idx, player1, player2 = self.select_players_to_swap()
+            if telemetry is not None:
+                telemetry.lap("select")
 
-            # Store the current teams before swapping
-            current_teams = [dict(team) for team in self.teams]
-
-            self.swap_players(team1_idx, team2_idx, player1, player2)
+            new_balance = self.evaluate_swap(team1_idx, team2_idx, player1, player2)
+            if telemetry is not None:
+                telemetry.lap("evaluate")
 
-            if any(self.has_two_max_rated_players(team) for team in self.teams):
-                # Revert the swap if it violates the constraint
-                self.teams = current_teams
-                success = False
-            else:
-                new_balance = sum(self.calculate_balance_score(team) for team in self.teams)
-                success = new_balance < best_balance
+            # Skip the swap if it violates the constraint
+            success = new_balance is not None and new_balance < best_balance
 
-                if success:
-                    best_balance = new_balance
-                    self.best_teams = [dict(team) for team in self.teams]
-                else:
-                    # Revert the swap if it doesn't improve the balance
-                    self.teams = current_teams
+            # Only apply the swap if it improves the balance
+            if success:
+                self.swap_players(team1_idx, team2_idx, player1, player2)
+                best_balance = new_balance
+                self.best_assignment = self.state.assignment.copy()
 
             self.update_swap_stats(team1_idx, team2_idx, player1, player2, success)
+            if telemetry is not None:
+                telemetry.lap("apply")
+                telemetry.record(best_balance, rejected=new_balance is None, accepted=success)
 
-        return self.best_teams
-
-    def swap_players(self, team1_idx, team2_idx, player1, player2):
-        self.teams[team1_idx][player1], self.teams[team2_idx][player2] = (
-            self.teams[team2_idx].pop(player2),
-            self.teams[team1_idx].pop(player1),
-        )
-
+        return self.get_best_teams()
@@ -1,11 +1,26 @@
+import queue
 import random
 import math
+import threading
+import numpy as np
 from abc import ABC, abstractmethod
 
+from models.budget import SearchBudget
+from models.cache import fingerprint
+from models.constraints import RosterConstraints
+from models.initializers import RandomDeal
+from models.objectives import intra_team_spread
+from models.state import TeamState
+from models.telemetry import SolverTelemetry
+
 
 class TeamFormulator:
-    def __init__(self, players):
+    def __init__(self, players, cache=None, positions=None):
         self.players = players
+        # Optional models.cache.SolutionCache shared between formulators
+        self.cache = cache
+        # Position names, e.g. from db.queries.get_position_names; defaults to the first player's keys
+        self.positions = positions
 
     def determine_positions(self, team):
         positions = {}
@@ -15,95 +30,329 @@ class TeamFormulator:
             positions[player] = position
         return positions
 
-    def formulate_teams(self, algorithm):
-        best_teams = algorithm.run()
+    def formulate_teams(self, algorithm, time_limit=None, stagnation_limit=None):
+        key = None
+        if self.cache is not None:
+            key = fingerprint(self.players, algorithm, time_limit, stagnation_limit)
+            results = self.cache.get(key)
+            if results is not None:
+                return results
+
+        # time_limit is in seconds; either limit lets the solver stop before its iteration count
+        if time_limit is not None or stagnation_limit is not None:
+            algorithm.set_budget(time_limit, stagnation_limit)
+        results = self.format_results(algorithm.run(), algorithm.objective)
+        if key is not None:
+            self.cache.put(key, results)
+        return results
+
+    def iter_solutions(self, algorithm, time_limit=None, stagnation_limit=None, cancel=None, timeout=None):
+        """Yield a formulate_teams result for every new best split, ending with the final one.
+
+        The solver runs on a background thread and reports improvements
+        through its telemetry (solvers without set_telemetry, such as
+        MultiStart, only report the final split); an on_improve already set
+        on that telemetry is still called. Setting `cancel`, a
+        threading.Event, or closing the generator stops the search; the best
+        split so far is then the final one, and isn't cached. With `timeout`,
+        None is yielded whenever that many seconds pass without news, so a UI
+        can refresh between improvements.
+        """
+        if self.cache is not None:
+            key = fingerprint(self.players, algorithm, time_limit, stagnation_limit)
+            results = self.cache.get(key)
+            if results is not None:
+                yield results
+                return
+
+        cancel = cancel or threading.Event()
+        updates = queue.Queue()
+        telemetry = None
+        if hasattr(algorithm, "set_telemetry"):
+            telemetry = algorithm.telemetry or SolverTelemetry()
+            # A caller's own on_improve is still called at every improvement, and is put back at the end
+            previous = telemetry.on_improve
+
+            def on_improve(current):
+                if previous is not None:
+                    previous(current)
+                updates.put(("best", algorithm.get_best_teams()))
+
+            telemetry.on_improve = on_improve
+            algorithm.set_telemetry(telemetry)
+        algorithm.set_budget(time_limit, stagnation_limit, cancel=cancel)
+
+        def work():
+            try:
+                updates.put(("done", algorithm.run()))
+            except Exception as error:
+                updates.put(("error", error))
+
+        worker = threading.Thread(target=work, daemon=True)
+        worker.start()
+        finished = False
+        try:
+            while not finished:
+                try:
+                    kind, value = updates.get(timeout=timeout)
+                except queue.Empty:
+                    yield None
+                    continue
+                if kind == "error":
+                    raise value
+                finished = kind == "done"
+                results = self.format_results(value, algorithm.objective)
+                # A cancelled search stops early; its split doesn't stand for the full budget
+                if finished and self.cache is not None and not cancel.is_set():
+                    self.cache.put(key, results)
+                yield results
+        finally:
+            if not finished:
+                cancel.set()
+            worker.join()
+            if telemetry is not None:
+                telemetry.on_improve = previous
+
+    def format_results(self, best_teams, objective=None):
+        # objective is the one the solver optimized; each team's balance_score is its share of that score
         results = {}
+        balance_scores = self.team_scores(best_teams, objective)
         for i, team in enumerate(best_teams):
             positions = self.determine_positions(team)
-            balance_score = self.calculate_balance_score(team)
             results[f"Team {i + 1}"] = {
                 "team": team,
                 "positions": positions,
-                "balance_score": balance_score,
+                "balance_score": float(balance_scores[i]),
             }
         return results
 
+    def split_state(self, teams, objective=None):
+        # TeamState holding the split `teams` of this formulator's players
+        state = TeamState.from_players(self.players, len(teams), self.positions, objective)
+        index = {name: i for i, name in enumerate(state.names)}
+        assignment = np.zeros(state.num_players, dtype=np.intp)
+        for team, members in enumerate(teams):
+            assignment[[index[name] for name in members]] = team
+        state.set_assignment(assignment)
+        return state
+
+    def team_scores(self, teams, objective=None):
+        """Each team's share of the objective's score for the split; the shares add up to it.
+
+        A team's share is its own weighted spread plus an even part of the
+        terms that compare teams (variance and parity). With the default
+        objective that is the team's spread, as calculate_balance_score gives.
+        """
+        if not teams:
+            return np.zeros(0)
+        state = self.split_state(teams, objective)
+        if not state.positions:
+            return np.zeros(len(teams))
+        spreads = state.objective.spread * state.team_balances()
+        return spreads + (state.balance_score() - spreads.sum()) / len(teams)
+
+    def score_split(self, teams, objective=None, constraints=None):
+        # The score a solver with this objective gives the split; a split that breaks a constraint never wins
+        state = self.split_state(teams, objective)
+        if constraints is not None and constraints.track(state).batch_violations(state.assignment) > 0:
+            return float("inf")
+        return state.balance_score() if state.positions else 0.0
+
+    def formulate_teams_parallel(
+        self, algorithm_class, runs=4, workers=None, seed=None, time_limit=None, stagnation_limit=None, **params
+    ):
+        """Multi-start mode: run `runs` seeded copies of algorithm_class(players, **params) on a process pool.
+
+        The seed of the winning run is kept in self.best_seed.
+        """
+        from models.parallel import MultiStart
+
+        params.setdefault("positions", self.positions)
+        multistart = MultiStart(algorithm_class, self.players, runs=runs, workers=workers, seed=seed, **params)
+        results = self.formulate_teams(multistart, time_limit, stagnation_limit)
+        self.best_seed = multistart.best_seed
+        return results
+
+    def choose_algorithm(self, num_teams=2, max_gap=0.02, profiles=None, **params):
+        """Solver for this roster from the tuned profiles (see tune.py and models.profiles).
+
+        Picks the fastest configuration of the roster's size/team-count
+        bucket whose mean gap to the best known score is at most max_gap.
+        params such as constraints, initializer or objective go to the
+        solver; the chosen configuration is kept in self.profile.
+        """
+        from models.profiles import SolverProfiles
+
+        profiles = profiles or SolverProfiles.load()
+        self.profile = profiles.choose(len(self.players), num_teams, max_gap)
+        params.setdefault("positions", self.positions)
+        return profiles.build(self.profile, self.players, num_teams, **params)
+
+    def formulate_teams_auto(self, num_teams=2, max_gap=0.02, time_limit=None, stagnation_limit=None, **params):
+        return self.formulate_teams(self.choose_algorithm(num_teams, max_gap, **params), time_limit, stagnation_limit)
+
     def calculate_balance_score(self, team):
-        scores = {"forward": 0, "midfielder": 0, "defender": 0}
-        for ratings in team.values():
-            for position in scores:
-                scores[position] += ratings[position]
-        balance_score = max(scores.values()) - min(scores.values())
-        return balance_score
+        positions = self.positions or list(next(iter(self.players.values()), {}))
+        if not positions:
+            return 0
+        ratings = np.array([[rating.get(position, 0) for position in positions] for rating in team.values()])
+        sums = ratings.reshape(len(team), len(positions)).sum(axis=0)
+        return float(intra_team_spread(sums[None, :]))
 
 
-class BanditAlgorithm(ABC):
-    def __init__(self, players, iterations):
+class SearchAlgorithm(ABC):
+    def __init__(
+        self, players, iterations, num_teams=2, constraints=None, initializer=None, objective=None, positions=None
+    ):
         self.players = players
         self.iterations = iterations
-        self.teams = []
+        self.num_teams = num_teams
+        self.constraints = constraints or RosterConstraints()
+        # Where the search starts: RandomDeal (default), SnakeDraft or WarmStart from models.initializers
+        self.initializer = initializer
+        # What "balanced" means: a models.objectives.Objective, intra-team spread by default
+        self.objective = objective
+        # Position names to optimize, as TeamFormulator(positions=...) scores them; the first player's keys by default
+        self.positions = positions
+        self.state = None
+        self.tracker = None
+        self.time_limit = None
+        self.stagnation_limit = None
+        self.shared_best = None
+        self.cancel = None
+        # False runs the full budget even once the lower bound is reached, e.g. to time a configuration
+        self.stop_at_bound = True
+        # True keeps iterations as a cap under a time limit; SolverProfiles.build sets it for tuned counts
+        self.iteration_cap = False
+        self.budget = None
+        # Optional models.telemetry.SolverTelemetry, see set_telemetry
+        self.telemetry = None
 
     @abstractmethod
-    def select_players_to_swap(self):
+    def run(self):
         pass
 
+    def get_best_teams(self):
+        return self.state.to_teams(self.players, self.best_assignment)
+
+    def set_budget(self, time_limit=None, stagnation_limit=None, shared_best=None, cancel=None, stop_at_bound=True):
+        self.time_limit = time_limit
+        self.stagnation_limit = stagnation_limit
+        self.shared_best = shared_best
+        self.cancel = cancel
+        self.stop_at_bound = stop_at_bound
+
+    def set_telemetry(self, telemetry):
+        # Kept out of __init__ so it never changes the solver's cache fingerprint
+        self.telemetry = telemetry
+
+    def start_telemetry(self):
+        if self.telemetry is not None:
+            self.telemetry.start()
+        return self.telemetry
+
+    def start_budget(self):
+        # Called by run() once self.state exists, so the lower bound can be computed
+        self.budget = SearchBudget(
+            self.iterations,
+            self.time_limit,
+            self.stagnation_limit,
+            self.state.lower_bound() if self.stop_at_bound else None,
+            self.shared_best,
+            self.cancel,
+            self.iteration_cap,
+        )
+        return self.budget
+
+
+class BanditAlgorithm(SearchAlgorithm):
     @abstractmethod
-    def run(self):
+    def select_players_to_swap(self):
         pass
 
     def swap_players(self, team1_idx, team2_idx, player1, player2):
-        self.teams[team1_idx][player1], self.teams[team2_idx][player2] = (
-            self.teams[team2_idx][player2],
-            self.teams[team1_idx][player1],
-        )
+        # Players are row indices into self.state; the team indices are implied by the assignment
+        self.tracker.swap(player1, player2)
 
-    def calculate_balance_score(self, team):
-        scores = {"forward": 0, "midfielder": 0, "defender": 0}
-        for ratings in team.values():
-            for position in scores:
-                scores[position] += ratings[position]
-        balance_score = max(scores.values()) - min(scores.values())
-        return balance_score
-
-    def has_two_max_rated_players(self, team):
-        max_rated_positions = set()
-        for ratings in team.values():
-            for position, rating in ratings.items():
-                if rating == 10:
-                    if position in max_rated_positions:
-                        return True
-                    max_rated_positions.add(position)
-        return False
-
-    def initialize_teams(self, num_teams):
-        self.teams = [{} for _ in range(num_teams)]
-        player_list = list(self.players.items())
-        random.shuffle(player_list)
-
-        for i, (player, skills) in enumerate(player_list):
-            self.teams[i % num_teams][player] = skills
+    def calculate_balance_score(self):
+        return self.state.balance_score()
 
-    def evaluate_swap(self, team1_idx, team2_idx, player1, player2):
-        current_teams = [dict(team) for team in self.teams]
+    def violates_constraints(self):
+        return self.tracker.violations > 0
+
+    def initialize_teams(self):
+        self.state = TeamState.from_players(self.players, self.num_teams, self.positions, self.objective)
+        self.state.set_assignment((self.initializer or RandomDeal()).initialize(self.state))
+        self.tracker = self.constraints.track(self.state)
+        self.repair_teams()
+
+    def repair_teams(self):
+        # Fix what the random deal broke, e.g. split must-together pairs
+        self.tracker.repair()
+
+    def random_swap(self):
+        team1, team2 = random.sample(range(self.num_teams), 2)
+        player1 = random.choice(self.state.members(team1))
+        player2 = random.choice(self.state.members(team2))
+        return team1, team2, player1, player2
 
-        self.swap_players(team1_idx, team2_idx, player1, player2)
+    def current_balance(self):
+        # An infeasible starting split never counts as the best one
+        if self.violates_constraints():
+            return float("inf")
+        return self.calculate_balance_score()
 
-        if any(self.has_two_max_rated_players(team) for team in self.teams):
-            # Revert the swap if it violates the constraint
-            self.teams = current_teams
+    def evaluate_swap(self, team1_idx, team2_idx, player1, player2):
+        if not self.tracker.swap_allowed(player1, player2):
             return None
+        return self.calculate_balance_score() + self.state.swap_delta(player1, player2)
 
-        new_balance = sum(self.calculate_balance_score(team) for team in self.teams)
-        self.teams = current_teams
+    def evaluate_move(self, players, new_teams):
+        # Like evaluate_swap, for a move from models.neighborhoods: players[i] goes to new_teams[i]
+        if not self.tracker.moves_allowed(players, new_teams):
+            return None
+        return self.calculate_balance_score() + float(self.state.move_deltas(players, new_teams))
 
-        return new_balance
+    def apply_move(self, players, new_teams):
+        self.tracker.move(players, new_teams)
 
+    def score_all_swaps(self):
+        # New balance score for every (player1, player2) swap; inf marks invalid pairs
+        players = np.arange(self.state.num_players)
+        players1, players2 = players[:, None], players[None, :]
+        scores = self.calculate_balance_score() + self.state.swap_deltas(players1, players2)
+        scores[~self.tracker.swap_allowed(players1, players2)] = np.inf
+        # Each swap shows up twice; keep the lower team index first, like the team loops did
+        teams = self.state.assignment
+        scores[teams[:, None] > teams[None, :]] = np.inf
+        if self.telemetry is not None:
+            self.telemetry.scored += int(np.isfinite(scores).sum())
+        return scores
+
+
+def canonical_assignments(assignments, num_teams):
+    """Relabel teams in order of first appearance, for any stack of assignment rows.
+
+    Two splits with the same teams under different labels become the same
+    row: the first player's team is always 0, the first player outside it
+    starts team 1, and so on.
+    """
+    assignments = np.asarray(assignments)
+    onehot = assignments[..., None, :] == np.arange(num_teams)[:, None]
+    # Empty teams sort last
+    first = np.where(onehot.any(axis=-1), onehot.argmax(axis=-1), assignments.shape[-1])
+    labels = np.argsort(np.argsort(first, axis=-1, kind="stable"), axis=-1)
+    return np.take_along_axis(labels, assignments, axis=-1)
 
-class EvolutionaryAlgorithm(ABC):
-    def __init__(self, players, iterations):
-        self.players = players
-        self.iterations = iterations
 
+def partition_keys(assignments, num_teams):
+    # One hashable key per assignment row, equal for splits that only differ by team labels
+    canonical = canonical_assignments(assignments, num_teams)
+    canonical = canonical.astype(np.uint8 if num_teams <= 256 else np.uint32).reshape(-1, canonical.shape[-1])
+    return [row.tobytes() for row in canonical]
+
+
+class EvolutionaryAlgorithm(SearchAlgorithm):
     @abstractmethod
     def initialize_population(self):
         pass
@@ -123,7 +372,3 @@ class EvolutionaryAlgorithm(ABC):
     @abstractmethod
     def mutate(self, individual):
         pass
-
-    @abstractmethod
-    def run(self):
-        pass
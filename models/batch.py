@@ -0,0 +1,231 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from models.base import BanditAlgorithm, TeamFormulator
+from models.budget import SearchBudget
+from models.constraints import RosterConstraints
+from models.initializers import RandomDeal
+from models.state import TeamState
+
+
+class BatchSearch(BanditAlgorithm):
+    """Epsilon-greedy search over many independent (players, num_teams) problems at once.
+
+    All problems share one TeamState: rosters are concatenated, and problem
+    b owns its own block of team indices. A swap between two teams of the
+    same problem only changes those two teams, so the combined balance score
+    is the sum of the per-problem scores and each problem's swap deltas stay
+    exact. Every iteration scores the swap matrices of all problems as one
+    padded (problems x players x players) array and applies the chosen swap
+    of each problem, so a batch costs about as many Python-level steps as a
+    single game.
+
+    Players are keyed (problem index, name) inside the shared state, so the
+    same player may appear in several problems. The score is the default
+    intra-team spread objective, the only one that adds up team by team.
+    """
+
+    def __init__(self, problems, iterations, epsilon=0.1, constraints=None, initializer=None):
+        self.problems = [(dict(players), num_teams) for players, num_teams in problems]
+        combined = {
+            (b, name): ratings for b, (players, _) in enumerate(self.problems) for name, ratings in players.items()
+        }
+        total_teams = sum(num_teams for _, num_teams in self.problems)
+        super().__init__(combined, iterations, total_teams, constraints, initializer)
+        self.epsilon = epsilon
+        # Pair rules name players, which are keyed by problem in the shared state
+        self.constraints = RosterConstraints(
+            self.constraints.max_rating,
+            self.expand_pairs(self.constraints.must_separate),
+            self.expand_pairs(self.constraints.must_together),
+            self.constraints.max_elite_per_team,
+            self.constraints.elite_rating,
+        )
+
+    def expand_pairs(self, pairs):
+        return [
+            ((b, first), (b, second))
+            for b, (players, _) in enumerate(self.problems)
+            for first, second in pairs
+            if first in players and second in players
+        ]
+
+    def initialize_teams(self):
+        # Positions missing from a roster count as 0, like an unrated position
+        positions = list(
+            dict.fromkeys(pos for players, _ in self.problems for ratings in players.values() for pos in ratings)
+        )
+        names = list(self.players)
+        ratings = [[self.players[name].get(pos, 0) for pos in positions] for name in names]
+        self.state = TeamState(names, positions, ratings, self.num_teams)
+
+        sizes = np.array([len(players) for players, _ in self.problems], dtype=np.intp)
+        team_counts = np.array([num_teams for _, num_teams in self.problems], dtype=np.intp)
+        self.player_offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+        self.team_offsets = np.concatenate([[0], np.cumsum(team_counts)[:-1]]).astype(np.intp)
+
+        # Each problem is dealt on its own, then its team indices are shifted into its block
+        assignment = np.empty(self.state.num_players, dtype=np.intp)
+        for b, (players, num_teams) in enumerate(self.problems):
+            rows = slice(self.player_offsets[b], self.player_offsets[b] + sizes[b])
+            local = TeamState(names[rows], positions, self.state.ratings[rows], num_teams)
+            assignment[rows] = (self.initializer or RandomDeal()).initialize(local) + self.team_offsets[b]
+        self.state.set_assignment(assignment)
+        self.tracker = self.constraints.track(self.state)
+        self.repair_teams()
+
+        # Padded player grid: grid[b, i] is problem b's i-th player, padding repeats its first player
+        width = max(sizes.max(initial=0), 1)
+        columns = np.arange(width)
+        self.valid = columns[None, :] < sizes[:, None]
+        self.grid = self.player_offsets[:, None] + np.where(self.valid, columns[None, :], 0)
+
+    def problem_bounds(self):
+        # Lower bound of each problem's balance score; see TeamState.lower_bound
+        if not self.state.positions:
+            return np.zeros(len(self.problems))
+        totals = np.add.reduceat(self.state.ratings, self.player_offsets, axis=0)
+        return totals.max(axis=1) - totals.min(axis=1)
+
+    def problem_scores(self):
+        return np.add.reduceat(self.state.team_balances(), self.team_offsets)
+
+    def lower_bound(self):
+        # The per-problem bounds add up, like the balance scores
+        return float(self.problem_bounds().sum())
+
+    def start_budget(self):
+        self.budget = SearchBudget(
+            self.iterations,
+            self.time_limit,
+            self.stagnation_limit,
+            self.lower_bound() if self.stop_at_bound else None,
+            self.shared_best,
+            self.cancel,
+            self.iteration_cap,
+        )
+        return self.budget
+
+    def select_players_to_swap(self, problems):
+        """Chosen swap of each given problem, as arrays (players1, players2, balance deltas); inf where none is allowed."""
+        grid, valid = self.grid[problems], self.valid[problems]
+        players1, players2 = grid[:, :, None], grid[:, None, :]
+        teams = self.state.assignment[grid]
+        # Each swap once (lower team first); a swap may not add a violation anywhere in the batch
+        playable = valid[:, :, None] & valid[:, None, :] & (teams[:, :, None] < teams[:, None, :])
+        playable &= self.tracker.violations_after_swap(players1, players2) <= self.tracker.violations
+        deltas = np.where(playable, self.state.swap_deltas(players1, players2), np.inf)
+        if self.telemetry is not None:
+            self.telemetry.scored += int(playable.sum())
+
+        # Explore: a random playable swap; exploit: the best one
+        num_problems, width = grid.shape
+        noise = np.where(playable, np.random.random(playable.shape), np.inf)
+        explore = np.random.random(num_problems) < self.epsilon
+        choice = np.where(
+            explore,
+            noise.reshape(num_problems, -1).argmin(axis=1),
+            deltas.reshape(num_problems, -1).argmin(axis=1),
+        )
+        rows, columns = np.divmod(choice, width)
+        rows_index = np.arange(num_problems)
+        return grid[rows_index, rows], grid[rows_index, columns], deltas[rows_index, rows, columns]
+
+    def run(self):
+        self.initialize_teams()
+        best_balance = self.current_balance()
+        self.best_assignment = self.state.assignment.copy()
+
+        # Problems that reach their lower bound are done and drop out of the scoring
+        bounds = self.problem_bounds() + SearchBudget.TOLERANCE
+        active = np.flatnonzero(self.problem_scores() > bounds)
+
+        budget = self.start_budget()
+        telemetry = self.start_telemetry()
+        while len(active) and budget.step(best_balance):
+            players1, players2, deltas = self.select_players_to_swap(active)
+            if telemetry is not None:
+                telemetry.lap("evaluate")
+            # Only improving swaps are applied; problems never share a team, so they apply independently
+            improving = np.flatnonzero(deltas < -SearchBudget.TOLERANCE)
+            for b in improving:
+                self.tracker.swap(players1[b], players2[b])
+            if len(improving):
+                best_balance = self.current_balance()
+                self.best_assignment = self.state.assignment.copy()
+                active = np.flatnonzero(self.problem_scores() > bounds)
+            if telemetry is not None:
+                telemetry.lap("apply")
+                telemetry.record(best_balance, evaluated=len(deltas), accepted=len(improving))
+
+        return self.get_best_teams()
+
+    def get_best_teams(self):
+        # One list of team dicts per problem, in the problems' order
+        results = [[{} for _ in range(num_teams)] for _, num_teams in self.problems]
+        for (b, name), team in zip(self.state.names, self.best_assignment):
+            results[b][team - self.team_offsets[b]][name] = self.problems[b][0][name]
+        return results
+
+
+def _solve_chunk(problems, iterations, epsilon, constraints, initializer, time_limit, stagnation_limit, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    search = BatchSearch(problems, iterations, epsilon, constraints, initializer)
+    if time_limit is not None or stagnation_limit is not None:
+        search.set_budget(time_limit, stagnation_limit)
+    return search.run()
+
+
+class BatchFormulator:
+    """Forms teams for many games at once, e.g. every pitch of an evening.
+
+    problems is a list of (players, num_teams) pairs. formulate_teams
+    returns one TeamFormulator.formulate_teams result dict per problem, in
+    the same order. The problems are solved together by BatchSearch; with
+    workers > 1 they are split into that many chunks, each solved by its own
+    BatchSearch on a process pool.
+    """
+
+    def __init__(self, problems, constraints=None, initializer=None):
+        self.problems = list(problems)
+        self.constraints = constraints
+        self.initializer = initializer
+
+    def formulate_teams(
+        self, iterations=1000, epsilon=0.1, time_limit=None, stagnation_limit=None, workers=1, seed=None
+    ):
+        if not self.problems:
+            return []
+        workers = min(workers or os.cpu_count() or 1, len(self.problems))
+        if seed is None:
+            seed = random.SystemRandom().randrange(2**31)
+        # Round-robin chunks keep big and small problems mixed in every worker
+        chunks = [list(range(w, len(self.problems), workers)) for w in range(workers)]
+        jobs = [
+            (
+                [self.problems[i] for i in chunk],
+                iterations,
+                epsilon,
+                self.constraints,
+                self.initializer,
+                time_limit,
+                stagnation_limit,
+                seed + w,
+            )
+            for w, chunk in enumerate(chunks)
+        ]
+        if workers == 1:
+            solved = [_solve_chunk(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                solved = list(pool.map(_solve_chunk, *zip(*jobs)))
+
+        results = [None] * len(self.problems)
+        for chunk, teams in zip(chunks, solved):
+            for i, best_teams in zip(chunk, teams):
+                results[i] = TeamFormulator(self.problems[i][0]).format_results(best_teams)
+        return results
@@ -0,0 +1,94 @@
+import time
+
+
+class SearchBudget:
+    """Decides when a solver's main loop should stop.
+
+    The loop calls step(best) once per iteration with its best score so far.
+    It stops when the iterations run out, the wall-clock time_limit passes,
+    stagnation_limit iterations go by without improvement, or the best score
+    reaches lower_bound, after which no split can do better. With a
+    time_limit the iteration count is no longer a cap, so the whole latency
+    budget is used unless the search converges first; with iteration_cap
+    set it stays one, and the run stops at whichever limit comes first.
+
+    shared_best is an optional multiprocessing.Value holding the best score
+    of a group of runs; each run publishes its improvements to it and stops
+    once any run has reached the lower bound.
+
+    cancel is an optional threading.Event; setting it from another thread
+    stops the loop at its next step.
+    """
+
+    # Improvements smaller than this are rounding noise in the rating averages
+    TOLERANCE = 1e-9
+
+    def __init__(
+        self,
+        iterations=None,
+        time_limit=None,
+        stagnation_limit=None,
+        lower_bound=None,
+        shared_best=None,
+        cancel=None,
+        iteration_cap=False,
+    ):
+        self.iterations = iterations if time_limit is None or iteration_cap else None
+        self.time_limit = time_limit
+        self.stagnation_limit = stagnation_limit
+        self.lower_bound = lower_bound
+        self.shared_best = shared_best
+        self.cancel = cancel
+        self.start()
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.deadline = None if self.time_limit is None else self.started + self.time_limit
+        self.iteration = 0
+        self.stagnant = 0
+        self.best = float("inf")
+        self.stop_reason = None
+        return self
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def time_left(self):
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.perf_counter(), 0.0)
+
+    def publish(self, best):
+        with self.shared_best.get_lock():
+            if best < self.shared_best.value:
+                self.shared_best.value = best
+
+    def step(self, best):
+        if best < self.best - self.TOLERANCE:
+            self.best = best
+            self.stagnant = 0
+            if self.shared_best is not None:
+                self.publish(best)
+        else:
+            self.stagnant += 1
+
+        if self.cancel is not None and self.cancel.is_set():
+            self.stop_reason = "cancelled"
+        elif self.lower_bound is not None and self.best <= self.lower_bound + self.TOLERANCE:
+            self.stop_reason = "lower_bound"
+        elif (
+            self.shared_best is not None
+            and self.lower_bound is not None
+            and self.shared_best.value <= self.lower_bound + self.TOLERANCE
+        ):
+            self.stop_reason = "shared_lower_bound"
+        elif self.iterations is not None and self.iteration >= self.iterations:
+            self.stop_reason = "iterations"
+        elif self.stagnation_limit is not None and self.stagnant >= self.stagnation_limit:
+            self.stop_reason = "stagnation"
+        elif self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.stop_reason = "time_limit"
+        else:
+            self.iteration += 1
+            return True
+        return False
@@ -0,0 +1,111 @@
+import hashlib
+import inspect
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def describe(value):
+    """JSON-friendly description of a solver's configuration.
+
+    Scalars, containers and classes are kept as they are. Solvers and
+    constraints are described by the attributes named after their __init__
+    parameters, so run-time state never leaks into the description.
+    """
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [describe(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): describe(item) for key, item in sorted(value.items(), key=lambda pair: str(pair[0]))}
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    parameters = inspect.signature(type(value).__init__).parameters
+    attributes = {
+        name: describe(getattr(value, name))
+        for name in parameters
+        if name not in ("self", "players") and hasattr(value, name)
+    }
+    return {"class": describe(type(value)), **attributes}
+
+
+def fingerprint(players, algorithm, *extra):
+    # Canonical hash of (sorted player set, rating matrix, solver class + params + seed, extra settings)
+    names = sorted(players)
+    positions = sorted({position for name in names for position in players[name]})
+    ratings = [[float(players[name].get(position, 0)) for position in positions] for name in names]
+    payload = json.dumps(
+        {"players": names, "positions": positions, "ratings": ratings, "algorithm": describe(algorithm), "extra": describe(list(extra))},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LRUCache:
+    """Bounded map that drops its least recently used entry when full.
+
+    hits and misses count get() calls; stats() summarizes them. Every
+    method holds the cache's lock, so one cache can be shared between
+    threads, e.g. the Streamlit sessions of a server process.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        with self.lock:
+            hits, misses, entries = self.hits, self.misses, len(self.entries)
+        lookups = hits + misses
+        return {"entries": entries, "hits": hits, "misses": misses, "hit_rate": hits / lookups if lookups else 0.0}
+
+
+class SolutionCache(LRUCache):
+    """LRU cache of TeamFormulator.formulate_teams results.
+
+    Keys come from fingerprint(). sync() takes a version of the rating data
+    (e.g. the row count and highest id of the ratings table) and drops every
+    entry when it changes, so new ratings invalidate old splits.
+    """
+
+    def __init__(self, max_entries=32):
+        super().__init__(max_entries)
+        self.version = None
+
+    def sync(self, version):
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
@@ -0,0 +1,288 @@
+import numpy as np
+
+from models.state import move_changes, team_totals
+
+
+class RosterConstraints:
+    """Roster rules a split has to satisfy.
+
+    By default a team may not hold two players rated max_rating at the same
+    position. Optionally, named pairs can be kept apart or together, and the
+    number of elite players (best rating >= elite_rating) per team can be capped.
+    """
+
+    def __init__(
+        self,
+        max_rating=10,
+        must_separate=(),
+        must_together=(),
+        max_elite_per_team=None,
+        elite_rating=9,
+    ):
+        self.max_rating = max_rating
+        self.must_separate = list(must_separate)
+        self.must_together = list(must_together)
+        self.max_elite_per_team = max_elite_per_team
+        self.elite_rating = elite_rating
+
+    def track(self, state):
+        return ConstraintTracker(state, self)
+
+
+class PlayerPairs:
+    """Named player pairs as per-player partner lists (CSR), for the pair rules.
+
+    partners(player) lists a player's partners and contains() tests pairs for
+    broadcast index arrays, so memory grows with the number of pairs rather
+    than with the square of the roster.
+    """
+
+    def __init__(self, index, pairs):
+        num_players = len(index)
+        unique = {tuple(sorted((index[a], index[b]))) for a, b in pairs if a in index and b in index and a != b}
+        # Each pair once, lower index first
+        self.pairs = np.array(sorted(unique), dtype=np.intp).reshape(-1, 2)
+        self.num_players = num_players
+        # Both directions, sorted by player then partner
+        first, second = self.pairs[:, 0], self.pairs[:, 1]
+        self.keys = np.sort(np.concatenate([first * num_players + second, second * num_players + first]))
+        self.players, self.indices = np.divmod(self.keys, max(num_players, 1))
+        self.indptr = np.searchsorted(self.players, np.arange(num_players + 1))
+        self.degree = np.diff(self.indptr)
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def partners(self, player):
+        return self.indices[self.indptr[player] : self.indptr[player + 1]]
+
+    def contains(self, players, partners):
+        # 1 where (players, partners) is a pair, 0 elsewhere; the arguments broadcast
+        keys = np.asarray(players) * self.num_players + np.asarray(partners)
+        if not len(self.keys):
+            return np.zeros(keys.shape, dtype=int)
+        found = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return (self.keys[found] == keys).astype(int)
+
+    def team_counts(self, assignment, num_teams):
+        # counts[p, t]: p's partners in team t
+        counts = np.zeros((self.num_players, num_teams), dtype=int)
+        np.add.at(counts, (self.players, assignment[self.indices]), 1)
+        return counts
+
+
+class ConstraintTracker:
+    """Per-team counters for RosterConstraints over a TeamState.
+
+    Every rule is precomputed into player masks (max-rated positions, elite
+    flags) or partner lists (PlayerPairs) and turned into counters per team, so checking a
+    swap only reads the two affected teams' rows. The tracker keeps the total
+    number of violations of the current split; violations_after_swap and
+    violations_after_moves broadcast like TeamState.swap_deltas and
+    TeamState.move_deltas.
+    """
+
+    def __init__(self, state, constraints):
+        self.state = state
+        self.constraints = constraints
+        num_players, num_teams = state.num_players, state.num_teams
+        index = {name: i for i, name in enumerate(state.names)}
+
+        self.max_rated = (state.ratings == constraints.max_rating).astype(int)
+        self.elite = (state.ratings.max(axis=1, initial=0) >= constraints.elite_rating).astype(int)
+        self.elite_cap = constraints.max_elite_per_team
+
+        self.separate = PlayerPairs(index, constraints.must_separate)
+        self.together = PlayerPairs(index, constraints.must_together)
+        self.has_pairs = bool(len(self.separate) or len(self.together))
+        self.together_degree = self.together.degree
+
+        self.max_rated_counts = np.zeros((num_teams, self.max_rated.shape[1]), dtype=int)
+        self.elite_counts = np.zeros(num_teams, dtype=int)
+        self.separate_counts = np.zeros((num_players, num_teams), dtype=int)
+        self.together_counts = np.zeros((num_players, num_teams), dtype=int)
+        self.reset()
+
+    def reset(self):
+        # Rebuild every counter from the state's current assignment
+        assignment = self.state.assignment
+        self.max_rated_counts = team_totals(assignment, self.max_rated, self.state.num_teams).astype(int)
+        self.elite_counts = team_totals(assignment, self.elite[:, None], self.state.num_teams)[:, 0].astype(int)
+        if len(self.separate):
+            self.separate_counts = self.separate.team_counts(assignment, self.state.num_teams)
+        if len(self.together):
+            self.together_counts = self.together.team_counts(assignment, self.state.num_teams)
+        self.violations = int(self._team_excess(np.arange(self.state.num_teams)).sum() + self._pair_violations().sum())
+
+    def _excess(self, max_rated_rows, elite_counts):
+        excess = (max_rated_rows > 1).sum(axis=-1)
+        if self.elite_cap is not None:
+            excess = excess + (elite_counts > self.elite_cap)
+        return excess
+
+    def _team_excess(self, teams):
+        return self._excess(self.max_rated_counts[teams], self.elite_counts[teams])
+
+    def _pair_violations(self, players=None):
+        # Violated pairs per player: separate partners in the same team, together partners elsewhere
+        if players is None:
+            players = np.arange(self.state.num_players)
+        if not self.has_pairs:
+            return np.zeros(np.shape(players), dtype=int)
+        teams = self.state.assignment[players]
+        violations = self.together_degree[players]
+        if len(self.separate):
+            violations = violations + self.separate_counts[players, teams]
+        if len(self.together):
+            violations = violations - self.together_counts[players, teams]
+        return violations
+
+    def _pair_violations_after_swap(self, player, partner, new_team):
+        # Violations of `player` once it has moved to new_team and `partner` has left it
+        violations = self.together_degree[player]
+        if len(self.separate):
+            violations = violations + self.separate_counts[player, new_team] - self.separate.contains(player, partner)
+        if len(self.together):
+            violations = violations - self.together_counts[player, new_team] + self.together.contains(player, partner)
+        return violations
+
+    def violations_after_swap(self, players1, players2):
+        team1 = self.state.assignment[players1]
+        team2 = self.state.assignment[players2]
+        max_rated_diff = self.max_rated[players2] - self.max_rated[players1]
+        elite_diff = self.elite[players2] - self.elite[players1]
+        violations = (
+            self.violations
+            - self._team_excess(team1)
+            - self._team_excess(team2)
+            + self._excess(self.max_rated_counts[team1] + max_rated_diff, self.elite_counts[team1] + elite_diff)
+            + self._excess(self.max_rated_counts[team2] - max_rated_diff, self.elite_counts[team2] - elite_diff)
+        )
+        if self.has_pairs:
+            # Only pairs touching the swapped players can change; each is seen from both ends
+            before = self._pair_violations(players1) + self._pair_violations(players2)
+            after = self._pair_violations_after_swap(players1, players2, team2) + self._pair_violations_after_swap(
+                players2, players1, team1
+            )
+            violations = violations + 2 * (after - before)
+        return np.where(team1 == team2, self.violations, violations)
+
+    def swap_allowed(self, players1, players2):
+        return self.violations_after_swap(players1, players2) == 0
+
+    def swap(self, player1, player2):
+        # Update the counters and apply the swap to the state
+        self.violations = int(self.violations_after_swap(player1, player2))
+        team1, team2 = self.state.assignment[player1], self.state.assignment[player2]
+        max_rated_diff = self.max_rated[player2] - self.max_rated[player1]
+        self.max_rated_counts[team1] += max_rated_diff
+        self.max_rated_counts[team2] -= max_rated_diff
+        elite_diff = self.elite[player2] - self.elite[player1]
+        self.elite_counts[team1] += elite_diff
+        self.elite_counts[team2] -= elite_diff
+        if len(self.separate):
+            self._move_partners(self.separate_counts, self.separate, player1, team1, team2)
+            self._move_partners(self.separate_counts, self.separate, player2, team2, team1)
+        if len(self.together):
+            self._move_partners(self.together_counts, self.together, player1, team1, team2)
+            self._move_partners(self.together_counts, self.together, player2, team2, team1)
+        self.state.swap(player1, player2)
+
+    def violations_after_moves(self, players, new_teams):
+        """Violations once players[..., i] has moved to new_teams[..., i], for each candidate move."""
+        players, new_teams = np.asarray(players), np.asarray(new_teams)
+        old_teams = self.state.assignment[players]
+        values = np.concatenate([self.max_rated[players], self.elite[players][..., None]], axis=-1)
+        teams, changes, first = move_changes(old_teams, new_teams, values)
+        # Each affected team counts once, through its first slot
+        before = self._team_excess(teams)
+        after = self._excess(
+            self.max_rated_counts[teams] + changes[..., :-1], self.elite_counts[teams] + changes[..., -1]
+        )
+        violations = self.violations + ((after - before) * first).sum(axis=-1)
+        if self.has_pairs:
+            # Pairs touching a moved player count from both ends, except pairs of two moved players,
+            # which the moved players' own counts already see twice
+            moved = players[..., :, None], players[..., None, :]
+            # [i, j]: moved player j ends up in (arrives) or leaves (leaves) player i's new team
+            arrives = (new_teams[..., None, :] == new_teams[..., :, None]).astype(int)
+            leaves = old_teams[..., None, :] == new_teams[..., :, None]
+            same_before = old_teams[..., :, None] == old_teams[..., None, :]
+            after = self.together_degree[players]
+            internal = 0
+            if len(self.separate):
+                partners = self.separate.contains(*moved)
+                after = after + self.separate_counts[players, new_teams] + (partners * (arrives - leaves)).sum(-1)
+                internal = internal + partners * (arrives - same_before)
+            if len(self.together):
+                partners = self.together.contains(*moved)
+                after = after - self.together_counts[players, new_teams] - (partners * (arrives - leaves)).sum(-1)
+                internal = internal + partners * (same_before - arrives)
+            before = self._pair_violations(players)
+            violations = violations + 2 * (after - before).sum(axis=-1) - np.sum(internal, axis=(-1, -2))
+        return violations
+
+    def moves_allowed(self, players, new_teams):
+        return self.violations_after_moves(players, new_teams) == 0
+
+    def move(self, players, new_teams):
+        # Update the counters and apply the move to the state
+        players, new_teams = np.atleast_1d(players), np.atleast_1d(new_teams)
+        self.violations = int(self.violations_after_moves(players, new_teams))
+        old_teams = self.state.assignment[players]
+        np.subtract.at(self.max_rated_counts, old_teams, self.max_rated[players])
+        np.add.at(self.max_rated_counts, new_teams, self.max_rated[players])
+        np.subtract.at(self.elite_counts, old_teams, self.elite[players])
+        np.add.at(self.elite_counts, new_teams, self.elite[players])
+        for player, old_team, new_team in zip(players, old_teams, new_teams):
+            if len(self.separate):
+                self._move_partners(self.separate_counts, self.separate, player, old_team, new_team)
+            if len(self.together):
+                self._move_partners(self.together_counts, self.together, player, old_team, new_team)
+        self.state.move(players, new_teams)
+
+    @staticmethod
+    def _move_partners(counts, pairs, player, old_team, new_team):
+        partners = pairs.partners(player)
+        counts[partners, old_team] -= 1
+        counts[partners, new_team] += 1
+
+    def batch_violations(self, assignments):
+        # Violation counts for a whole (individuals x players) assignment matrix, counted like self.violations
+        assignments = np.asarray(assignments)
+        num_teams = self.state.num_teams
+        violations = np.zeros(assignments.shape[:-1], dtype=int)
+        # Skip the per-team counts when no player can trigger the rule
+        if self.max_rated.any():
+            max_rated_counts = team_totals(assignments, self.max_rated, num_teams)
+            violations = violations + (max_rated_counts > 1).sum(axis=(-1, -2))
+        if self.elite_cap is not None:
+            elite_counts = team_totals(assignments, self.elite[:, None], num_teams)[..., 0]
+            violations = violations + (elite_counts > self.elite_cap).sum(axis=-1)
+        if len(self.separate):
+            player1, player2 = self.separate.pairs.T
+            violations = violations + 2 * (assignments[..., player1] == assignments[..., player2]).sum(axis=-1)
+        if len(self.together):
+            player1, player2 = self.together.pairs.T
+            violations = violations + 2 * (assignments[..., player1] != assignments[..., player2]).sum(axis=-1)
+        return violations.astype(int)
+
+    def team_violates(self, team):
+        return bool(self._team_excess(team) > 0 or (self._pair_violations(self.state.members(team)) > 0).any())
+
+    def repair(self, max_swaps=None, candidates=None):
+        # Greedily apply the swap that removes the most violations until none is left or no swap helps.
+        # candidates is an optional (players x c) array of swap partners per player; every pair by default
+        players = np.arange(self.state.num_players)
+        if max_swaps is None:
+            max_swaps = self.state.num_players
+        partners = players[None, :] if candidates is None else candidates
+        for _ in range(max_swaps):
+            if self.violations == 0 or not np.size(partners):
+                break
+            after = self.violations_after_swap(players[:, None], partners)
+            player1, slot = np.unravel_index(np.argmin(after), after.shape)
+            if after[player1, slot] >= self.violations:
+                break
+            self.swap(player1, np.broadcast_to(partners, after.shape)[player1, slot])
+        return self.violations == 0
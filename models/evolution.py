@@ -1,84 +1,185 @@
-import random
-from models.base import EvolutionaryAlgorithm
+import numpy as np
+from models.base import EvolutionaryAlgorithm, partition_keys
+from models.cache import LRUCache
+from models.state import TeamState
 
 
 class GeneticAlgorithm(EvolutionaryAlgorithm):
-    def __init__(self, players, iterations, population_size=50, mutation_rate=0.1):
-        super().__init__(players, iterations)
+    """Genetic search over k-team splits, one NumPy pass per generation.
+
+    Each individual is a row of random keys, one per player. Ranking a row
+    and cutting the ranks into num_teams contiguous blocks decodes it into a
+    team index per player, so the population is an (individuals x players)
+    assignment matrix with balanced team sizes. Any mix of two key rows
+    decodes to a valid split, which keeps crossover from losing or
+    duplicating players.
+
+    Many keys decode to the same split, and the same split shows up under
+    other team labels. With cache_size > 0, scores are memoized in an
+    LRUCache of that many splits (fitness_cache.stats() reports the hit
+    rate); it is off by default because the vectorized scoring of the
+    built-in objectives is cheaper than hashing every row, so it only pays
+    for expensive custom objectives. With deduplicate, an individual whose
+    split already appears earlier in the population is replaced by a fresh
+    random one, which keeps the population diverse.
+    """
+
+    def __init__(
+        self,
+        players,
+        iterations,
+        population_size=50,
+        mutation_rate=0.1,
+        num_teams=2,
+        elite_size=2,
+        tournament_size=3,
+        constraints=None,
+        initializer=None,
+        objective=None,
+        cache_size=0,
+        deduplicate=False,
+        positions=None,
+    ):
+        super().__init__(players, iterations, num_teams, constraints, initializer, objective, positions)
         self.population_size = population_size
         self.mutation_rate = mutation_rate
-        self.population = []
+        self.elite_size = min(elite_size, population_size)
+        self.tournament_size = tournament_size
+        self.cache_size = cache_size
+        self.deduplicate = deduplicate
+        self.population = None
+        self.fitness_cache = None
 
     def initialize_population(self):
-        self.population = []
-        player_list = list(self.players.items())
-        for _ in range(self.population_size):
-            random.shuffle(player_list)
-            mid_point = len(player_list) // 2
-            team1 = dict(player_list[:mid_point])
-            team2 = dict(player_list[mid_point:])
-            self.population.append((team1, team2))
-
-    def fitness(self, individual):
-        team1, team2 = individual
-        return self.calculate_balance_score(team1) + self.calculate_balance_score(team2)
-
-    def select_parents(self):
-        return random.sample(self.population, 2)
+        self.state = TeamState.from_players(self.players, self.num_teams, self.positions, self.objective)
+        self.tracker = self.constraints.track(self.state)
+        # Rank r lands in team r * k // n, which gives the same team sizes as a round-robin deal
+        num_players = self.state.num_players
+        self.rank_teams = np.arange(num_players) * self.num_teams // max(num_players, 1)
+        # Any infeasible split scores worse than every feasible one, whatever the objective's weights
+        self.penalty = self.state.upper_bound() + 1
+        # Scores depend on this run's roster, objective and constraints, so each run starts empty
+        self.fitness_cache = LRUCache(self.cache_size) if self.cache_size else None
+        self.population = np.random.random((self.population_size, num_players))
+        if self.initializer is not None:
+            self.population[0] = self.encode(self.initializer.initialize(self.state))
+
+    def encode(self, assignment):
+        # Keys that decode back to `assignment`: biggest teams take the first rank blocks
+        sizes = np.bincount(assignment, minlength=self.num_teams)
+        blocks = np.empty(self.num_teams, dtype=np.intp)
+        blocks[np.argsort(-sizes, kind="stable")] = np.arange(self.num_teams)
+        return (blocks[assignment] + np.random.random(len(assignment))) / self.num_teams
+
+    def decode(self, keys):
+        assignments = np.empty(keys.shape, dtype=np.intp)
+        np.put_along_axis(assignments, np.argsort(keys, axis=-1), self.rank_teams, axis=-1)
+        return assignments
+
+    def score(self, assignments):
+        return self.state.batch_balance_scores(assignments) + self.penalty * self.tracker.batch_violations(
+            assignments
+        )
+
+    def fitness(self, assignments, keys=None):
+        # Works on a single assignment row or the whole population matrix; splits seen before come from the cache
+        if self.fitness_cache is None:
+            return self.score(assignments)
+        rows = assignments.reshape(-1, assignments.shape[-1])
+        if keys is None:
+            keys = partition_keys(rows, self.num_teams)
+        scores = np.array([self.fitness_cache.get(key) for key in keys], dtype=float)
+        missing = np.flatnonzero(np.isnan(scores))
+        if len(missing):
+            scores[missing] = self.score(rows[missing])
+            for row in missing:
+                self.fitness_cache.put(keys[row], scores[row])
+        return scores.reshape(assignments.shape[:-1])
+
+    def replace_duplicates(self, assignments):
+        """Give every repeated split but its first copy fresh random keys; returns the assignments and their keys."""
+        keys = partition_keys(assignments, self.num_teams)
+        seen = set()
+        repeated = []
+        for row, key in enumerate(keys):
+            if key in seen:
+                repeated.append(row)
+            seen.add(key)
+        if repeated:
+            self.population[repeated] = np.random.random((len(repeated), self.population.shape[1]))
+            assignments[repeated] = self.decode(self.population[repeated])
+            for row, key in zip(repeated, partition_keys(assignments[repeated], self.num_teams)):
+                keys[row] = key
+        return assignments, keys
+
+    def select_parents(self, scores, count):
+        # Tournament selection: the fittest of tournament_size random individuals, for both parents at once
+        entrants = np.random.randint(0, len(scores), size=(2, count, self.tournament_size))
+        winners = np.take_along_axis(entrants, np.argmin(scores[entrants], axis=-1)[..., None], axis=-1)[..., 0]
+        return self.population[winners[0]], self.population[winners[1]]
 
     def reproduce(self, parent1, parent2):
-        total_players = len(parent1[0]) + len(parent1[1])
-        break_point = total_players // 2
-        shuffled_players = list(parent1[0].items()) + list(parent2[1].items())
-        random.shuffle(shuffled_players)
-        child1_team1 = dict(shuffled_players[:break_point])
-        child1_team2 = dict(shuffled_players[break_point:])
-        self.validate_teams(child1_team1, child1_team2)
-        return (child1_team1, child1_team2)
-
-    def mutate(self, individual):
-        if random.random() < self.mutation_rate:
-            team1, team2 = individual
-            if not team1 or not team2:
-                return
-            player1 = random.choice(list(team1.keys()))
-            player2 = random.choice(list(team2.keys()))
-            if player1 in team2 and player2 in team1:
-                team1[player2], team2[player1] = team2.pop(player1), team1.pop(player2)
-            self.validate_teams(team1, team2)
+        # Uniform crossover on the keys; decoding ranks the mixed keys, so every player appears exactly once
+        inherit = np.random.random(parent1.shape) < 0.5
+        return np.where(inherit, parent1, parent2)
+
+    def mutate(self, individuals):
+        # Swap the keys, and with them the teams, of two random players in each mutated individual
+        rows = np.flatnonzero(np.random.random(len(individuals)) < self.mutation_rate)
+        if len(rows) == 0 or individuals.shape[1] < 2:
+            return
+        num_players = individuals.shape[1]
+        first = np.random.randint(0, num_players, len(rows))
+        second = (first + np.random.randint(1, num_players, len(rows))) % num_players
+        individuals[rows, first], individuals[rows, second] = individuals[rows, second], individuals[rows, first]
+
+    def next_generation(self):
+        # Decode the population, replacing duplicates when asked, and score it
+        assignments, keys = self.decode(self.population), None
+        if self.deduplicate:
+            assignments, keys = self.replace_duplicates(assignments)
+        return assignments, self.fitness(assignments, keys)
 
     def run(self):
         self.initialize_population()
-        for _ in range(self.iterations):
-            new_population = []
-            for _ in range(len(self.population)):
-                parent1, parent2 = self.select_parents()
-                child1 = self.reproduce(parent1, parent2)
-                self.mutate(child1)
-                new_population.append(child1)
-            self.population = new_population
-        best_solution = min(self.population, key=self.fitness)
-        return best_solution
-
-    def validate_teams(self, team1, team2):
-        if len(team1) > len(team2) + 1:
-            # Move player from team1 to team2
-            keys = list(team1.keys())
-            for key in keys:
-                team2[key] = team1.pop(key)
-                if len(team1) <= len(team2) + 1:
-                    break
-        elif len(team2) > len(team1) + 1:
-            # Move player from team2 to team1
-            keys = list(team2.keys())
-            for key in keys:
-                team1[key] = team2.pop(key)
-                if len(team2) <= len(team1) + 1:
-                    break
-
-    def calculate_balance_score(self, team):
-        scores = {"forward": 0, "midfielder": 0, "defense": 0}
-        for ratings in team.values():
-            for position in scores:
-                scores[position] += ratings[position]
-        return max(scores.values()) - min(scores.values())
+        telemetry = self.start_telemetry()
+        assignments, scores = self.next_generation()
+        if telemetry is not None:
+            # The initial population is scored once before the first generation
+            telemetry.evaluated += len(scores)
+            telemetry.lap("evaluate")
+        best = np.argmin(scores)
+        self.best_score = scores[best]
+        self.best_assignment = assignments[best].copy()
+
+        budget = self.start_budget()
+        while budget.step(self.best_score):
+            # Elitism: carry the best individuals over unchanged
+            elite = np.argsort(scores)[: self.elite_size]
+            parent1, parent2 = self.select_parents(scores, self.population_size - self.elite_size)
+            if telemetry is not None:
+                telemetry.lap("select")
+            children = self.reproduce(parent1, parent2)
+            self.mutate(children)
+            self.population = np.concatenate([self.population[elite], children])
+            if telemetry is not None:
+                telemetry.lap("apply")
+
+            assignments, scores = self.next_generation()
+            if telemetry is not None:
+                telemetry.lap("evaluate")
+            best = np.argmin(scores)
+            accepted = scores[best] < self.best_score
+            if accepted:
+                self.best_score = scores[best]
+                self.best_assignment = assignments[best].copy()
+            if telemetry is not None:
+                # Rejected: children that break a constraint
+                telemetry.record(
+                    self.best_score,
+                    evaluated=len(children),
+                    rejected=int((self.tracker.batch_violations(assignments[self.elite_size :]) > 0).sum()),
+                    accepted=int(accepted),
+                )
+
+        return self.get_best_teams()
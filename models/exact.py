@@ -0,0 +1,329 @@
+import math
+import time
+import numpy as np
+
+from models.bandits import EpsilonGreedy
+from models.budget import SearchBudget
+from models.constraints import RosterConstraints
+from models.objectives import Objective, intra_team_spread
+from models.state import TeamState
+
+
+class BranchAndBound:
+    """Exact solver for rosters small enough to search exhaustively.
+
+    Players are placed one at a time, strongest first, into teams with the
+    same sizes a round-robin deal would give. Empty teams of equal size are
+    interchangeable, so only the first of them is tried. A branch is cut as
+    soon as a lower bound on its balance score reaches the best split found
+    so far; the bound uses the smallest and largest sums the remaining
+    players could still add to each team. Once only two teams have room and
+    at most tail_size players are left, every way of finishing the split is
+    scored in one vectorized pass.
+
+    When the estimated number of distinct splits exceeds max_search_space,
+    no split satisfies the constraints, or the objective weighs more than
+    the intra-team spread the bounds are built on, run() hands over to the
+    fallback heuristic (EpsilonGreedy by default).
+    """
+
+    def __init__(
+        self,
+        players,
+        num_teams=2,
+        constraints=None,
+        max_search_space=3_000_000,
+        fallback=None,
+        tail_size=12,
+        objective=None,
+        positions=None,
+    ):
+        self.players = players
+        self.num_teams = num_teams
+        self.constraints = constraints or RosterConstraints()
+        self.max_search_space = max_search_space
+        self.fallback = fallback
+        self.tail_size = tail_size
+        self.objective = objective or Objective()
+        # Position names to optimize over; the first player's keys by default
+        self.positions = positions
+        self.optimal = False
+        self.handed_over = None
+        self.time_limit = None
+        self.stagnation_limit = None
+        self.cancel = None
+        self.stop_at_bound = True
+        self.deadline = None
+        self.telemetry = None
+
+    def set_budget(self, time_limit=None, stagnation_limit=None, shared_best=None, cancel=None, stop_at_bound=True):
+        # A search cut short by the time limit or cancel returns its best split so far, unproven.
+        # stop_at_bound only applies to the fallback; the exact search stops once it has proven its split
+        self.time_limit = time_limit
+        self.stagnation_limit = stagnation_limit
+        self.cancel = cancel
+        self.stop_at_bound = stop_at_bound
+
+    def set_telemetry(self, telemetry):
+        # Records each new best split; the fallback gets the same telemetry
+        self.telemetry = telemetry
+
+    def team_sizes(self):
+        num_players = len(self.players)
+        return [num_players // self.num_teams + (t < num_players % self.num_teams) for t in range(self.num_teams)]
+
+    def search_space(self):
+        # Distinct splits once interchangeable (equal-size) teams are identified
+        sizes = self.team_sizes()
+        count = math.factorial(len(self.players))
+        for size in sizes:
+            count //= math.factorial(size)
+        for size in set(sizes):
+            count //= math.factorial(sizes.count(size))
+        return count
+
+    def run(self):
+        self.optimal = False
+        self.handed_over = None
+        if self.telemetry is not None:
+            self.telemetry.start()
+        self.deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        if not self.objective.spread_only or self.search_space() > self.max_search_space or not self.solve():
+            return self.run_fallback()
+        self.optimal = not self.timed_out
+        return self.get_best_teams()
+
+    def get_best_teams(self):
+        # Once the search has handed over, the best split is the fallback's
+        if self.handed_over is not None:
+            return self.handed_over.get_best_teams()
+        return self.state.to_teams(self.players, self.best_assignment)
+
+    def run_fallback(self):
+        fallback = self.fallback
+        if fallback is None:
+            fallback = EpsilonGreedy(
+                self.players,
+                iterations=1000,
+                num_teams=self.num_teams,
+                constraints=self.constraints,
+                objective=self.objective,
+                positions=self.positions,
+            )
+        if (
+            self.time_limit is not None
+            or self.stagnation_limit is not None
+            or self.cancel is not None
+            or not self.stop_at_bound
+        ):
+            time_left = None if self.deadline is None else max(self.deadline - time.perf_counter(), 0.0)
+            fallback.set_budget(time_left, self.stagnation_limit, cancel=self.cancel, stop_at_bound=self.stop_at_bound)
+        if self.telemetry is not None and hasattr(fallback, "set_telemetry"):
+            fallback.set_telemetry(self.telemetry)
+        self.handed_over = fallback
+        return fallback.run()
+
+    def solve(self):
+        self.state = TeamState.from_players(self.players, self.num_teams, self.positions, self.objective)
+        tracker = self.constraints.track(self.state)
+        num_players, num_teams = self.state.num_players, self.num_teams
+        num_positions = len(self.state.positions)
+
+        # Strongest players first so the bounds tighten early
+        self.order = np.argsort(-self.state.ratings.sum(axis=1), kind="stable")
+        ratings = self.state.ratings[self.order]
+        self.ratings = ratings.tolist()
+        self.max_rated = tracker.max_rated[self.order].tolist()
+        self.elite = tracker.elite[self.order].tolist()
+        self.elite_cap = tracker.elite_cap
+        self.separate_pairs = self._pairs(tracker.separate)
+        self.together_pairs = self._pairs(tracker.together)
+        self.separate_before = self._partners_before(self.separate_pairs, num_players)
+        self.together_before = self._partners_before(self.together_pairs, num_players)
+
+        # lowest[d][c][p] / highest[d][c][p]: smallest / largest sum c of players d.. can add at position p
+        self.lowest, self.highest = [], []
+        for depth in range(num_players + 1):
+            remaining = np.sort(ratings[depth:], axis=0)
+            cumulative = np.vstack([np.zeros(num_positions), np.cumsum(remaining, axis=0)])
+            self.lowest.append(cumulative.tolist())
+            self.highest.append((cumulative[-1] - cumulative[::-1]).tolist())
+
+        totals = ratings.sum(axis=0)
+        self.total_spread = totals.max() - totals.min() if num_positions else 0.0
+        # differences[i, q, r]: what player i adds to a team's position q minus position r
+        self.differences = ratings[:, :, None] - ratings[:, None, :]
+
+        self.sizes = self.team_sizes()
+        self.remaining = list(self.sizes)
+        self.sums = [[0.0] * num_positions for _ in range(num_teams)]
+        self.max_rated_counts = [[0] * num_positions for _ in range(num_teams)]
+        self.elite_counts = [0] * num_teams
+        self.assignment = [-1] * num_players
+        self.tails = {}
+        self.best_score = float("inf")
+        self.best_assignment = None
+        self.nodes = 0
+        self.timed_out = False
+
+        self._search(0)
+        return self.best_assignment is not None
+
+    def _pairs(self, pairs):
+        if not len(pairs):
+            return []
+        rank = np.empty(len(self.order), dtype=int)
+        rank[self.order] = np.arange(len(self.order))
+        first, second = pairs.pairs.T
+        return sorted((min(rank[a], rank[b]), max(rank[a], rank[b])) for a, b in zip(first, second))
+
+    @staticmethod
+    def _partners_before(pairs, num_players):
+        partners = [[] for _ in range(num_players)]
+        for a, b in pairs:
+            partners[b].append(a)
+        return partners
+
+    def _bound(self, depth):
+        # No split beats the spread of the whole roster's position totals
+        bound = self.total_spread
+
+        # Each team on its own: best and worst sums its open slots could still take
+        lowest, highest = self.lowest[depth], self.highest[depth]
+        per_team = 0.0
+        for sums, slots in zip(self.sums, self.remaining):
+            low, high = lowest[slots], highest[slots]
+            spread = max(s + l for s, l in zip(sums, low)) - min(s + h for s, h in zip(sums, high))
+            if spread > 0:
+                per_team += spread
+        bound = max(bound, per_team)
+
+        # Fix each team's current top and bottom position; every remaining player then
+        # adds at least its smallest top-minus-bottom difference over the open teams
+        if depth < len(self.ratings):
+            fixed, tops, bottoms = 0.0, [], []
+            for sums, slots in zip(self.sums, self.remaining):
+                top, bottom = max(range(len(sums)), key=sums.__getitem__), min(range(len(sums)), key=sums.__getitem__)
+                fixed += sums[top] - sums[bottom]
+                if slots:
+                    tops.append(top)
+                    bottoms.append(bottom)
+            bound = max(bound, fixed + self.differences[depth:][:, tops, bottoms].min(axis=1).sum())
+        return bound
+
+    def _can_place(self, player, team):
+        if any(c + m > 1 for c, m in zip(self.max_rated_counts[team], self.max_rated[player])):
+            return False
+        if self.elite_cap is not None and self.elite_counts[team] + self.elite[player] > self.elite_cap:
+            return False
+        if any(self.assignment[partner] == team for partner in self.separate_before[player]):
+            return False
+        return all(self.assignment[partner] == team for partner in self.together_before[player])
+
+    def _place(self, player, team, sign):
+        for position, rating in enumerate(self.ratings[player]):
+            self.sums[team][position] += sign * rating
+            self.max_rated_counts[team][position] += sign * self.max_rated[player][position]
+        self.elite_counts[team] += sign * self.elite[player]
+        self.remaining[team] -= sign
+        self.assignment[player] = team if sign > 0 else -1
+
+    def _search(self, depth):
+        self.nodes += 1
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.timed_out = True
+        elif self.cancel is not None and self.nodes % 1024 == 0 and self.cancel.is_set():
+            self.timed_out = True
+        if self.timed_out:
+            return
+        num_players = len(self.assignment)
+        if depth == num_players:
+            score = sum(max(sums) - min(sums) for sums in self.sums)
+            if score < self.best_score:
+                self.best_score = score
+                self._record(self.assignment)
+            return
+
+        open_teams = [team for team, slots in enumerate(self.remaining) if slots > 0]
+        if len(open_teams) == 2 and num_players - depth <= self.tail_size:
+            self._finish_tail(depth, *open_teams)
+            return
+
+        tried_empty = set()
+        for team in open_teams:
+            if self.remaining[team] == self.sizes[team]:
+                # Symmetry breaking: empty teams of the same size are interchangeable
+                if self.sizes[team] in tried_empty:
+                    continue
+                tried_empty.add(self.sizes[team])
+            if not self._can_place(depth, team):
+                continue
+            self._place(depth, team, 1)
+            # A bound that matches the best score up to rounding still prunes
+            if self._bound(depth + 1) < self.best_score - SearchBudget.TOLERANCE:
+                self._search(depth + 1)
+            self._place(depth, team, -1)
+
+    def _tail(self, size, count):
+        # Every subset of `count` among the last `size` players, with its rating, max-rated and elite sums
+        key = (size, count)
+        if key not in self.tails:
+            start = len(self.ratings) - size
+            members = ((np.arange(2**size)[:, None] >> np.arange(size)) & 1).astype(bool)
+            members = members[members.sum(axis=1) == count]
+            ratings = np.array(self.ratings[start:]).reshape(size, -1)
+            max_rated = np.array(self.max_rated[start:]).reshape(size, -1)
+            elite = np.array(self.elite[start:])
+            self.tails[key] = (members, members @ ratings, members @ max_rated, members @ elite)
+        return self.tails[key]
+
+    def _finish_tail(self, depth, team1, team2):
+        members, rating_sums, max_rated_sums, elite_sums = self._tail(
+            len(self.assignment) - depth, self.remaining[team1]
+        )
+        if not len(members):
+            return
+
+        # team1 takes the chosen subset, team2 the rest of the tail
+        tail_ratings = np.array(self.ratings[depth:]).sum(axis=0)
+        sums1 = np.array(self.sums[team1]) + rating_sums
+        sums2 = np.array(self.sums[team2]) + tail_ratings - rating_sums
+        fixed = sum(max(sums) - min(sums) for team, sums in enumerate(self.sums) if team not in (team1, team2))
+        scores = fixed + intra_team_spread(np.stack([sums1, sums2], axis=1))
+
+        tail_max_rated = np.array(self.max_rated[depth:]).sum(axis=0)
+        feasible = (np.array(self.max_rated_counts[team1]) + max_rated_sums <= 1).all(axis=1)
+        feasible &= (np.array(self.max_rated_counts[team2]) + tail_max_rated - max_rated_sums <= 1).all(axis=1)
+        if self.elite_cap is not None:
+            feasible &= self.elite_counts[team1] + elite_sums <= self.elite_cap
+            feasible &= self.elite_counts[team2] + sum(self.elite[depth:]) - elite_sums <= self.elite_cap
+        for a, b in self.separate_pairs + self.together_pairs:
+            if b < depth:
+                continue
+            together = (a, b) in self.together_pairs
+            in_team1 = members[:, b - depth]
+            if a >= depth:
+                same = in_team1 == members[:, a - depth]
+            elif self.assignment[a] == team1:
+                same = in_team1
+            elif self.assignment[a] == team2:
+                same = ~in_team1
+            else:
+                same = np.zeros(len(members), dtype=bool)
+            feasible &= same if together else ~same
+
+        scores[~feasible] = np.inf
+        best = np.argmin(scores)
+        if scores[best] < self.best_score:
+            self.best_score = float(scores[best])
+            assignment = list(self.assignment)
+            for offset, in_team1 in enumerate(members[best]):
+                assignment[depth + offset] = team1 if in_team1 else team2
+            self._record(assignment)
+
+    def _record(self, assignment):
+        # Map the search order back to the roster order
+        self.best_assignment = np.empty(len(assignment), dtype=np.intp)
+        self.best_assignment[self.order] = assignment
+        if self.telemetry is not None:
+            self.telemetry.record(self.best_score, evaluated=0, accepted=1)
@@ -0,0 +1,94 @@
+import random
+
+import numpy as np
+
+
+def deal(order, num_teams):
+    # Round-robin deal of player indices in the given order
+    assignment = np.empty(len(order), dtype=np.intp)
+    assignment[np.asarray(order, dtype=np.intp)] = np.arange(len(order)) % num_teams
+    return assignment
+
+
+def snake(order, num_teams):
+    # Snake deal: 0, 1, ..., k-1, k-1, ..., 1, 0, 0, 1, ...
+    picks = np.arange(len(order))
+    rounds, slots = np.divmod(picks, num_teams)
+    teams = np.where(rounds % 2 == 0, slots, num_teams - 1 - slots)
+    assignment = np.empty(len(order), dtype=np.intp)
+    assignment[np.asarray(order, dtype=np.intp)] = teams
+    return assignment
+
+
+class RandomDeal:
+    """Shuffle the roster and deal it round-robin (the original start)."""
+
+    def initialize(self, state):
+        order = list(range(state.num_players))
+        random.shuffle(order)
+        return deal(order, state.num_teams)
+
+
+class SnakeDraft:
+    """Position-aware snake draft.
+
+    Players are grouped by their best position and sorted strongest first
+    within each group, then drafted in snake order. Every team gets a fair
+    share of each position and of the top players, in O(n log n).
+    """
+
+    def initialize(self, state):
+        ratings = state.ratings
+        primary = ratings.argmax(axis=1)
+        strength = ratings.max(axis=1)
+        order = np.lexsort((-strength, primary))
+        return snake(order, state.num_teams)
+
+
+class WarmStart:
+    """Start from a previous split, given as lists of player names per team.
+
+    Players from the previous split keep their team (folded onto the first
+    num_teams teams). Newcomers are snake-drafted into the smallest teams, and
+    team sizes are then evened out to what a round-robin deal would give.
+    The previous split can be the last solve in a SolutionCache or the
+    teams of the most recent match.
+    """
+
+    def __init__(self, previous, fallback=None):
+        self.previous = [list(team) for team in previous]
+        self.fallback = fallback
+
+    def initialize(self, state):
+        num_teams = state.num_teams
+        known = {name: team % num_teams for team, names in enumerate(self.previous) for name in names}
+        if not any(name in known for name in state.names):
+            return (self.fallback or SnakeDraft()).initialize(state)
+
+        assignment = np.array([known.get(name, -1) for name in state.names], dtype=np.intp)
+        newcomers = np.flatnonzero(assignment < 0)
+        strength = state.ratings.max(axis=1)
+        for player in newcomers[np.argsort(-strength[newcomers], kind="stable")]:
+            sizes = np.bincount(assignment[assignment >= 0], minlength=num_teams)
+            assignment[player] = np.argmin(sizes)
+
+        # Even out the sizes: the biggest teams keep the bigger targets, extra players move
+        # from oversized to undersized teams, newest and weakest first
+        sizes = np.bincount(assignment, minlength=num_teams)
+        targets = np.empty(num_teams, dtype=int)
+        targets[np.argsort(-sizes, kind="stable")] = [
+            state.num_players // num_teams + (t < state.num_players % num_teams) for t in range(num_teams)
+        ]
+        is_new = np.zeros(state.num_players, dtype=bool)
+        is_new[newcomers] = True
+        movable = np.lexsort((strength, ~is_new))
+        for player in movable:
+            team = assignment[player]
+            if sizes[team] > targets[team]:
+                short = np.flatnonzero(sizes < targets)
+                if not len(short):
+                    break
+                sizes[team] -= 1
+                sizes[short[0]] += 1
+                assignment[player] = short[0]
+        return assignment
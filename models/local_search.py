@@ -0,0 +1,266 @@
+import math
+import random
+import numpy as np
+
+from models.base import BanditAlgorithm
+
+
+class SimulatedAnnealing(BanditAlgorithm):
+    """Random swaps that may make the split worse, with a probability that shrinks over time.
+
+    A swap that changes the balance by delta is kept with probability
+    exp(-delta / temperature), so improving swaps always go through and the
+    search can climb out of local minima while the temperature is high.
+
+    Cooling schedules, with progress running from 0 to 1 over the iterations
+    (or the time limit, when one is set):
+        geometric    T0 * cooling_rate ** iteration
+        linear       T0 * (1 - progress)
+        exponential  T0 * (min_temperature / T0) ** progress
+        logarithmic  T0 / log(iteration + e)
+
+    The starting temperature defaults to the mean size of a worsening swap
+    in the initial split, so about a third of those are accepted at first.
+
+    neighborhoods, a list from models.neighborhoods, replaces the 1-for-1
+    swap: every iteration draws one move from a random neighborhood, e.g.
+    [Swaps(), SingleMoves(1), PairSwaps(), Rotations()] for odd rosters or
+    uneven team counts.
+    """
+
+    SCHEDULES = ("geometric", "linear", "exponential", "logarithmic")
+
+    def __init__(
+        self,
+        players,
+        iterations,
+        initial_temperature=None,
+        schedule="geometric",
+        cooling_rate=0.995,
+        min_temperature=1e-3,
+        num_teams=2,
+        constraints=None,
+        initializer=None,
+        objective=None,
+        neighborhoods=None,
+        positions=None,
+    ):
+        super().__init__(players, iterations, num_teams, constraints, initializer, objective, positions)
+        if schedule not in self.SCHEDULES:
+            raise ValueError(f"Unknown cooling schedule: {schedule}")
+        self.initial_temperature = initial_temperature
+        self.schedule = schedule
+        self.cooling_rate = cooling_rate
+        self.min_temperature = min_temperature
+        self.neighborhoods = neighborhoods
+
+    def select_players_to_swap(self):
+        return self.random_swap()
+
+    def select_move(self):
+        # One random move from a random neighborhood as (players, new_teams); None if it drew nothing playable
+        players, new_teams = random.choice(self.neighborhoods).sample(self.state, 1)
+        if not len(players):
+            return None
+        return players[0], new_teams[0]
+
+    def estimate_temperature(self, samples=100):
+        players = np.arange(self.state.num_players)
+        deltas = self.state.swap_deltas(
+            np.random.choice(players, samples), np.random.choice(players, samples)
+        )
+        worse = deltas[np.isfinite(deltas) & (deltas > 0)]
+        return float(worse.mean()) if len(worse) else 1.0
+
+    def progress(self, budget):
+        if budget.deadline is not None:
+            return min(budget.elapsed() / budget.time_limit, 1.0)
+        if budget.iterations:
+            return min(budget.iteration / budget.iterations, 1.0)
+        return 0.0
+
+    def temperature(self, budget):
+        start = self.start_temperature
+        if self.schedule == "geometric":
+            temperature = start * self.cooling_rate**budget.iteration
+        elif self.schedule == "linear":
+            temperature = start * (1 - self.progress(budget))
+        elif self.schedule == "exponential":
+            temperature = start * (self.min_temperature / start) ** self.progress(budget)
+        else:
+            temperature = start / math.log(budget.iteration + math.e)
+        return max(temperature, self.min_temperature)
+
+    def run(self):
+        self.initialize_teams()
+        current_balance = best_balance = self.current_balance()
+        self.best_assignment = self.state.assignment.copy()
+        self.start_temperature = self.initial_temperature or self.estimate_temperature()
+
+        if self.neighborhoods:
+            select, evaluate, apply = self.select_move, self.evaluate_move, self.apply_move
+        else:
+            select, evaluate, apply = self.select_players_to_swap, self.evaluate_swap, self.swap_players
+
+        budget = self.start_budget()
+        telemetry = self.start_telemetry()
+        while budget.step(best_balance):
+            move = select()
+            if telemetry is not None:
+                telemetry.lap("select")
+            new_balance = None if move is None else evaluate(*move)
+            if telemetry is not None:
+                telemetry.lap("evaluate")
+            if new_balance is None:
+                # Skip the swap if it violates the constraint
+                if telemetry is not None:
+                    telemetry.record(best_balance, rejected=1)
+                continue
+
+            # Metropolis rule: always take improvements, sometimes take a worse split
+            delta = new_balance - current_balance
+            accepted = delta <= 0 or random.random() < math.exp(-delta / self.temperature(budget))
+            if accepted:
+                apply(*move)
+                current_balance = new_balance
+                if current_balance < best_balance:
+                    best_balance = current_balance
+                    self.best_assignment = self.state.assignment.copy()
+            if telemetry is not None:
+                telemetry.lap("apply")
+                telemetry.record(best_balance, accepted=accepted)
+
+        return self.get_best_teams()
+
+
+class TabuSearch(BanditAlgorithm):
+    """Steepest-descent swaps with a short-term memory of recently moved players.
+
+    Every iteration applies the best allowed swap, even when it makes the
+    split worse, so the search keeps moving after a local minimum. Both
+    players of an applied swap are tabu for `tenure` iterations (default
+    about the square root of the roster size); a tabu swap is still taken
+    when it beats the best split found so far (aspiration).
+
+    With sample_size set, each iteration scores that many random player
+    pairs instead of every pair, which keeps large rosters cheap.
+
+    neighborhoods, a list from models.neighborhoods, replaces the swaps:
+    each iteration draws sample_size moves (default: the roster size) from
+    every neighborhood and applies the best one. All players of an applied
+    move become tabu.
+    """
+
+    def __init__(
+        self,
+        players,
+        iterations,
+        tenure=None,
+        sample_size=None,
+        num_teams=2,
+        constraints=None,
+        initializer=None,
+        objective=None,
+        neighborhoods=None,
+        positions=None,
+    ):
+        super().__init__(players, iterations, num_teams, constraints, initializer, objective, positions)
+        self.tenure = tenure
+        self.sample_size = sample_size
+        self.neighborhoods = neighborhoods
+        self.tabu_until = None
+        self.iteration = 0
+        self.best_balance = float("inf")
+
+    def candidate_swaps(self):
+        # (players1, players2, new balance) for the swaps considered this iteration
+        if self.sample_size is None:
+            scores = self.score_all_swaps()
+            players1, players2 = np.nonzero(np.isfinite(scores))
+            return players1, players2, scores[players1, players2]
+
+        players1 = np.random.randint(0, self.state.num_players, self.sample_size)
+        players2 = np.random.randint(0, self.state.num_players, self.sample_size)
+        scores = self.calculate_balance_score() + self.state.swap_deltas(players1, players2)
+        scores[~self.tracker.swap_allowed(players1, players2)] = np.inf
+        if self.telemetry is not None:
+            self.telemetry.scored += self.sample_size
+        keep = np.isfinite(scores)
+        return players1[keep], players2[keep], scores[keep]
+
+    def select_players_to_swap(self):
+        # Best non-tabu swap, or a tabu one that beats the best split (aspiration); None if there is none
+        players1, players2, scores = self.candidate_swaps()
+        free = (self.tabu_until[players1] < self.iteration) & (self.tabu_until[players2] < self.iteration)
+        allowed = np.flatnonzero(free | (scores < self.best_balance))
+        if not len(allowed):
+            return None
+        best = allowed[np.argmin(scores[allowed])]
+        player1, player2 = players1[best], players2[best]
+        return self.state.assignment[player1], self.state.assignment[player2], player1, player2
+
+    def candidate_moves(self):
+        # (players, new_teams, new balance) of the moves drawn from each neighborhood this iteration
+        count = self.sample_size or self.state.num_players
+        for neighborhood in self.neighborhoods:
+            players, new_teams = neighborhood.sample(self.state, count)
+            scores = self.calculate_balance_score() + self.state.move_deltas(players, new_teams)
+            scores[~self.tracker.moves_allowed(players, new_teams)] = np.inf
+            if self.telemetry is not None:
+                self.telemetry.scored += len(players)
+            keep = np.isfinite(scores)
+            yield players[keep], new_teams[keep], scores[keep]
+
+    def select_move(self):
+        # Like select_players_to_swap, over the neighborhoods' moves; (players, new_teams) or None
+        best = None
+        for players, new_teams, scores in self.candidate_moves():
+            free = (self.tabu_until[players] < self.iteration).all(axis=1)
+            allowed = np.flatnonzero(free | (scores < self.best_balance))
+            if not len(allowed):
+                continue
+            pick = allowed[np.argmin(scores[allowed])]
+            if best is None or scores[pick] < best[2]:
+                best = players[pick], new_teams[pick], scores[pick]
+        return None if best is None else best[:2]
+
+    def run(self):
+        self.initialize_teams()
+        self.best_balance = self.current_balance()
+        self.best_assignment = self.state.assignment.copy()
+        tenure = self.tenure or max(2, int(math.sqrt(self.state.num_players)))
+        # Iteration until which each player stays tabu
+        self.tabu_until = np.zeros(self.state.num_players, dtype=int)
+
+        if self.neighborhoods:
+            select, evaluate, apply = self.select_move, self.evaluate_move, self.apply_move
+        else:
+            select, evaluate, apply = self.select_players_to_swap, self.evaluate_swap, self.swap_players
+
+        budget = self.start_budget()
+        telemetry = self.start_telemetry()
+        while budget.step(self.best_balance):
+            self.iteration = budget.iteration
+            move = select()
+            if telemetry is not None:
+                telemetry.lap("select")
+            if move is None:
+                if telemetry is not None:
+                    telemetry.record(self.best_balance, evaluated=0)
+                continue
+
+            # Always move, even uphill; the memory keeps the search from undoing it right away
+            new_balance = evaluate(*move)
+            if telemetry is not None:
+                telemetry.lap("evaluate")
+            apply(*move)
+            moved = move[0] if self.neighborhoods else list(move[2:])
+            self.tabu_until[moved] = self.iteration + tenure
+            if new_balance < self.best_balance:
+                self.best_balance = new_balance
+                self.best_assignment = self.state.assignment.copy()
+            if telemetry is not None:
+                telemetry.lap("apply")
+                telemetry.record(self.best_balance, accepted=1)
+
+        return self.get_best_teams()
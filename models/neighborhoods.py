@@ -0,0 +1,84 @@
+import numpy as np
+
+
+def random_teams(num_teams, count, size):
+    # `count` rows of `size` distinct random team indices
+    return np.random.random((count, num_teams)).argsort(axis=1)[:, :size]
+
+
+def random_members(state, teams, count=1):
+    """`count` distinct random members of each given team, shape teams.shape + (count,).
+
+    Teams with fewer than `count` members get arbitrary indices; check the
+    team sizes before using them.
+    """
+    team_sizes = np.bincount(state.assignment, minlength=state.num_teams)
+    order = np.argsort(state.assignment, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(team_sizes)[:-1]])[teams]
+    sizes = team_sizes[teams]
+    picks = []
+    for k in range(count):
+        pick = np.random.randint(0, 2**31, np.shape(teams)) % np.maximum(sizes - k, 1)
+        if picks:
+            # Skip over the earlier picks, smallest first, so the picks stay distinct
+            for earlier in np.moveaxis(np.sort(np.stack(picks, axis=-1), axis=-1), -1, 0):
+                pick = pick + (pick >= earlier)
+        picks.append(pick)
+    return order[np.minimum(starts[..., None] + np.stack(picks, axis=-1), len(order) - 1)]
+
+
+class Swaps:
+    """1-for-1 swaps between two teams, the move every solver already makes."""
+
+    def sample(self, state, count):
+        teams = random_teams(state.num_teams, count, 2)
+        players = random_members(state, teams)[..., 0]
+        valid = (state.team_sizes()[teams] >= 1).all(axis=1)
+        return players[valid], teams[valid][:, ::-1]
+
+
+class SingleMoves:
+    """One player moves to another team, which changes both teams' sizes.
+
+    Sizes stay within size_tolerance of a round-robin deal, i.e. between
+    players // teams - size_tolerance and ceil(players / teams) +
+    size_tolerance, and no team is ever emptied. With the default 0 this
+    only moves the extra players of an odd roster around; a tolerance of 1
+    or more lets the sizes themselves balance the teams.
+    """
+
+    def __init__(self, size_tolerance=0):
+        self.size_tolerance = size_tolerance
+
+    def sample(self, state, count):
+        teams = random_teams(state.num_teams, count, 2)
+        players = random_members(state, teams[:, :1])[..., 0]
+        sizes = state.team_sizes()
+        smallest = max(state.num_players // state.num_teams - self.size_tolerance, 1)
+        largest = -(-state.num_players // state.num_teams) + self.size_tolerance
+        valid = (sizes[teams[:, 0]] - 1 >= smallest) & (sizes[teams[:, 1]] + 1 <= largest)
+        return players[valid], teams[valid][:, 1:]
+
+
+class PairSwaps:
+    """2-for-2 swaps: two players of one team trade places with two of another."""
+
+    def sample(self, state, count):
+        teams = random_teams(state.num_teams, count, 2)
+        members = random_members(state, teams, 2)
+        valid = (state.team_sizes()[teams] >= 2).all(axis=1)
+        players = members.reshape(count, 4)
+        new_teams = np.repeat(teams[:, ::-1], 2, axis=1)
+        return players[valid], new_teams[valid]
+
+
+class Rotations:
+    """Cyclic 3-team rotations: a player of team A goes to B, one of B to C and one of C to A."""
+
+    def sample(self, state, count):
+        if state.num_teams < 3:
+            return np.empty((0, 3), dtype=np.intp), np.empty((0, 3), dtype=np.intp)
+        teams = random_teams(state.num_teams, count, 3)
+        players = random_members(state, teams)[..., 0]
+        valid = (state.team_sizes()[teams] >= 1).all(axis=1)
+        return players[valid], np.roll(teams, -1, axis=1)[valid]
@@ -0,0 +1,127 @@
+import numpy as np
+
+# Kernels score a stack of splits from their team position sums, shape (..., teams, positions)
+
+
+def intra_team_spread(team_sums):
+    # Sum over teams of the gap between a team's strongest and weakest position
+    return (team_sums.max(axis=-1) - team_sums.min(axis=-1)).sum(axis=-1)
+
+
+def strength_variance(team_sums):
+    # Variance of the teams' total strength
+    return team_sums.sum(axis=-1).var(axis=-1)
+
+
+def position_parity(team_sums):
+    # Sum over positions of the gap between the strongest and weakest team at that position
+    return (team_sums.max(axis=-2) - team_sums.min(axis=-2)).sum(axis=-1)
+
+
+def _extreme_without(team_sums, teams, largest):
+    # Per position, the largest (or smallest) sum among the teams not in `teams` (..., m)
+    excluded = teams.shape[-1]
+    # At most m teams are excluded, so one of the top m + 1 remains whenever any team does
+    order = np.argsort(-team_sums if largest else team_sums, axis=0)[: excluded + 1]
+    values = np.take_along_axis(team_sums, order, axis=0)
+    result = np.full(teams.shape[:-1] + (team_sums.shape[1],), -np.inf if largest else np.inf)
+    for rank in range(len(order) - 1, -1, -1):
+        kept = (order[rank] != teams[..., None]).all(axis=-2)
+        result = np.where(kept, values[rank], result)
+    return result
+
+
+class Objective:
+    """Weighted balance objective shared by every solver.
+
+    spread   intra_team_spread: each team should be equally strong at every position
+    variance strength_variance: the teams' total strengths should match
+    parity   position_parity: each position should be equally strong across teams
+
+    The default (spread only) is the original balance score. Calling the
+    objective scores any stack of team sums; swap_deltas and change_deltas
+    score swaps and other moves from the current sums without rebuilding them.
+    """
+
+    def __init__(self, spread=1.0, variance=0.0, parity=0.0):
+        self.spread = spread
+        self.variance = variance
+        self.parity = parity
+
+    @property
+    def spread_only(self):
+        return self.variance == 0 and self.parity == 0
+
+    def __call__(self, team_sums):
+        score = 0.0
+        if self.spread:
+            score = score + self.spread * intra_team_spread(team_sums)
+        if self.variance:
+            score = score + self.variance * strength_variance(team_sums)
+        if self.parity:
+            score = score + self.parity * position_parity(team_sums)
+        return score
+
+    def swap_deltas(self, team_sums, team1, team2, diff):
+        """Change in score when team1 gains diff and team2 loses it; all arguments broadcast."""
+        new_sums1 = team_sums[team1] + diff
+        new_sums2 = team_sums[team2] - diff
+        delta = 0.0
+        if self.spread:
+            balances = team_sums.max(axis=1) - team_sums.min(axis=1)
+            delta = delta + self.spread * (
+                new_sums1.max(axis=-1) - new_sums1.min(axis=-1)
+                + new_sums2.max(axis=-1) - new_sums2.min(axis=-1)
+                - balances[team1]
+                - balances[team2]
+            )
+        if self.variance:
+            # The mean strength is unchanged, so only the two squared totals move
+            totals = team_sums.sum(axis=1)
+            moved = diff.sum(axis=-1)
+            delta = delta + self.variance * (
+                (totals[team1] + moved) ** 2 + (totals[team2] - moved) ** 2 - totals[team1] ** 2 - totals[team2] ** 2
+            ) / len(team_sums)
+        if self.parity:
+            pair = np.stack(np.broadcast_arrays(team1, team2), axis=-1)
+            highest = np.maximum(_extreme_without(team_sums, pair, True), np.maximum(new_sums1, new_sums2))
+            lowest = np.minimum(_extreme_without(team_sums, pair, False), np.minimum(new_sums1, new_sums2))
+            delta = delta + self.parity * ((highest - lowest).sum(axis=-1) - position_parity(team_sums))
+        return delta
+
+    def change_deltas(self, team_sums, teams, diffs):
+        """Change in score when each teams[..., i] gains diffs[..., i, :].
+
+        teams is (..., m) and diffs (..., m, positions). A team may be listed
+        more than once, with the same change in each of its slots.
+        """
+        old_sums = team_sums[teams]
+        new_sums = old_sums + diffs
+        # Teams listed twice count once, through their first slot
+        first = (teams[..., :, None] == teams[..., None, :]).argmax(axis=-1) == np.arange(teams.shape[-1])
+        delta = 0.0
+        if self.spread:
+            spreads = (new_sums.max(axis=-1) - new_sums.min(axis=-1)) - (old_sums.max(axis=-1) - old_sums.min(axis=-1))
+            delta = delta + self.spread * (first * spreads).sum(axis=-1)
+        if self.variance:
+            # The mean strength is unchanged, so only the changed teams' squared totals move
+            old_totals = old_sums.sum(axis=-1)
+            new_totals = new_sums.sum(axis=-1)
+            delta = delta + self.variance * (first * (new_totals**2 - old_totals**2)).sum(axis=-1) / len(team_sums)
+        if self.parity:
+            highest = np.maximum(_extreme_without(team_sums, teams, True), new_sums.max(axis=-2))
+            lowest = np.minimum(_extreme_without(team_sums, teams, False), new_sums.min(axis=-2))
+            delta = delta + self.parity * ((highest - lowest).sum(axis=-1) - position_parity(team_sums))
+        return delta
+
+    def lower_bound(self, ratings):
+        # Spreads add up at least to the spread of the roster's position totals; the other kernels can reach 0
+        if not ratings.shape[1]:
+            return 0.0
+        totals = ratings.sum(axis=0)
+        return float(self.spread * (totals.max() - totals.min()))
+
+    def upper_bound(self, ratings):
+        # Each spread or parity gap is at most the roster's total rating, and the variance its square
+        total = float(np.abs(ratings).sum())
+        return self.spread * total + self.variance * total**2 + self.parity * total
@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from models.base import TeamFormulator
+
+# Best score found by any run in the pool, installed in each worker by _init_worker
+_shared_best = None
+
+
+def _init_worker(shared_best):
+    global _shared_best
+    _shared_best = shared_best
+
+
+def run_seeded(
+    algorithm_class,
+    players,
+    params,
+    seed,
+    time_limit=None,
+    stagnation_limit=None,
+    shared_best=None,
+    stop_at_bound=True,
+):
+    """Run one solver with every random source seeded, so the same seed reproduces the split."""
+    random.seed(seed)
+    np.random.seed(seed)
+    algorithm = algorithm_class(players, **params)
+    if shared_best is None:
+        shared_best = _shared_best
+    if time_limit is not None or stagnation_limit is not None or shared_best is not None or not stop_at_bound:
+        algorithm.set_budget(time_limit, stagnation_limit, shared_best, stop_at_bound=stop_at_bound)
+    teams = algorithm.run()
+    # Runs are compared on what they optimized: the solver's own objective and constraints
+    formulator = TeamFormulator(players, positions=params.get("positions"))
+    score = formulator.score_split(teams, algorithm.objective, algorithm.constraints)
+    return score, seed, teams
+
+
+class MultiStart:
+    """Runs independently seeded copies of one solver and keeps the best split.
+
+    Runs go to a ProcessPoolExecutor and share the best score found so far,
+    so every run stops as soon as one of them reaches the lower bound. With
+    workers=1 the runs happen in this process, one after another. The seed
+    of the winning run is kept in best_seed; run_seeded with that seed
+    reproduces the split.
+    """
+
+    def __init__(self, algorithm_class, players, runs=4, workers=None, seed=None, **params):
+        self.algorithm_class = algorithm_class
+        self.players = players
+        self.runs = runs
+        self.workers = workers or min(runs, os.cpu_count() or 1)
+        self.seed = seed
+        self.params = params
+        # What the runs optimize, for scoring the winner like they do
+        self.objective = params.get("objective")
+        self.time_limit = None
+        self.stagnation_limit = None
+        self.stop_at_bound = True
+        self.results = []
+        self.best_seed = None
+
+    def set_budget(self, time_limit=None, stagnation_limit=None, shared_best=None, cancel=None, stop_at_bound=True):
+        # Every run gets the full time limit; they run side by side. A thread's cancel event can't
+        # reach the worker processes, so the runs always finish
+        self.time_limit = time_limit
+        self.stagnation_limit = stagnation_limit
+        self.stop_at_bound = stop_at_bound
+
+    def seeds(self):
+        base = self.seed if self.seed is not None else random.SystemRandom().randrange(2**31)
+        return [(base + i) % 2**32 for i in range(self.runs)]
+
+    def run(self):
+        shared_best = multiprocessing.Value("d", float("inf"))
+        jobs = [
+            (self.algorithm_class, self.players, self.params, seed, self.time_limit, self.stagnation_limit)
+            for seed in self.seeds()
+        ]
+        if self.workers == 1:
+            self.results = [
+                run_seeded(*job, shared_best=shared_best, stop_at_bound=self.stop_at_bound) for job in jobs
+            ]
+        else:
+            with ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(shared_best,)) as pool:
+                run = partial(run_seeded, stop_at_bound=self.stop_at_bound)
+                self.results = list(pool.map(run, *zip(*jobs)))
+
+        score, self.best_seed, teams = min(self.results, key=lambda result: result[0])
+        return teams
@@ -0,0 +1,70 @@
+import json
+import os
+
+from models.bandits import EpsilonGreedy, UCB, ThompsonSampling
+from models.evolution import GeneticAlgorithm
+
+# Written by tune.py
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILES_PATH = os.path.join(ROOT, "data", "solver_profiles.json")
+
+SOLVER_CLASSES = {
+    "EpsilonGreedy": EpsilonGreedy,
+    "UCB": UCB,
+    "ThompsonSampling": ThompsonSampling,
+    "GeneticAlgorithm": GeneticAlgorithm,
+}
+
+# Used when no profile has been tuned yet: the Teams page's long-standing choice
+DEFAULT_CONFIG = {"solver": "EpsilonGreedy", "params": {"epsilon": 0.1}, "iterations": 1000}
+
+
+class SolverProfiles:
+    """Tuned solver configurations per roster-size / team-count bucket.
+
+    Each bucket holds the configurations on its speed/quality front, fastest
+    first: seconds is the mean run time on the tuning rosters and gap the
+    mean relative distance of its score from the best score any
+    configuration reached there. choose() returns the fastest configuration
+    whose gap is at most max_gap, or the most accurate one if none is.
+    """
+
+    def __init__(self, buckets=()):
+        self.buckets = list(buckets)
+
+    @classmethod
+    def load(cls, path=PROFILES_PATH):
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as file:
+            return cls(json.load(file)["buckets"])
+
+    def save(self, path=PROFILES_PATH, **info):
+        with open(path, "w") as file:
+            json.dump({**info, "buckets": self.buckets}, file, indent=2)
+
+    def find_bucket(self, num_players, num_teams):
+        # Same team count if possible, then the smallest bucket that fits the roster, else the largest one
+        def distance(bucket):
+            fits = bucket["max_players"] >= num_players
+            return abs(bucket["num_teams"] - num_teams), not fits, bucket["max_players"] * (1 if fits else -1)
+
+        return min(self.buckets, key=distance, default=None)
+
+    def choose(self, num_players, num_teams, max_gap=0.02):
+        bucket = self.find_bucket(num_players, num_teams)
+        if bucket is None or not bucket["configs"]:
+            return DEFAULT_CONFIG
+        good = [config for config in bucket["configs"] if config["gap"] <= max_gap]
+        if good:
+            return min(good, key=lambda config: config["seconds"])
+        return min(bucket["configs"], key=lambda config: config["gap"])
+
+    @staticmethod
+    def build(config, players, num_teams=2, **params):
+        # params (constraints, initializer, objective) go to the solver alongside the tuned ones
+        algorithm_class = SOLVER_CLASSES[config["solver"]]
+        algorithm = algorithm_class(players, config["iterations"], num_teams=num_teams, **config["params"], **params)
+        # The tuned iteration count still caps a run given a time limit, which then only cuts it shorter
+        algorithm.iteration_cap = True
+        return algorithm
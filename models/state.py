@@ -0,0 +1,160 @@
+import numpy as np
+
+from models.objectives import Objective
+
+
+def team_totals(assignments, values, num_teams):
+    """Sum per-player values by team for any stack of assignment rows.
+
+    assignments is (..., players) and values is (players, k); the result is
+    (..., num_teams, k), computed with one bincount per column.
+    """
+    assignments = np.asarray(assignments)
+    num_players = assignments.shape[-1]
+    rows = assignments.reshape(-1, num_players)
+    index = (np.arange(len(rows))[:, None] * num_teams + rows).ravel()
+    totals = np.stack(
+        [
+            np.bincount(index, weights=np.tile(values[:, column], len(rows)), minlength=len(rows) * num_teams)
+            for column in range(values.shape[1])
+        ],
+        axis=-1,
+    )
+    return totals.reshape(assignments.shape[:-1] + (num_teams, values.shape[1]))
+
+
+def move_changes(old_teams, new_teams, values):
+    """Per-team changes of a move that sends several players to new teams at once.
+
+    old_teams and new_teams are (..., m) and values (..., m, k) holds the
+    moved players' values. Returns the affected teams (..., 2m), their
+    changes (..., 2m, k) and a mask of each team's first slot, since a team
+    can be listed more than once (with the same change in each slot).
+    """
+    teams = np.concatenate([old_teams, new_teams], axis=-1)
+    first = (teams[..., :, None] == teams[..., None, :]).argmax(axis=-1) == np.arange(teams.shape[-1])
+    weights = (teams[..., :, None] == new_teams[..., None, :]).astype(int) - (
+        teams[..., :, None] == old_teams[..., None, :]
+    )
+    return teams, weights @ values, first
+
+
+class TeamState:
+    """Array-backed team assignment.
+
+    Ratings live in a players x positions matrix, the split is an integer
+    team index per player and the per-team position sums are kept up to date
+    on every swap or move, so solvers never have to copy or rebuild team dicts.
+    """
+
+    def __init__(self, names, positions, ratings, num_teams, objective=None):
+        self.names = list(names)
+        self.positions = list(positions)
+        self.ratings = np.asarray(ratings, dtype=float).reshape(len(self.names), len(self.positions))
+        self.num_teams = num_teams
+        self.assignment = np.zeros(len(self.names), dtype=np.intp)
+        self.team_sums = np.zeros((num_teams, len(self.positions)))
+        # Scores splits; see models.objectives
+        self.objective = objective or Objective()
+
+    @classmethod
+    def from_players(cls, players, num_teams, positions=None, objective=None):
+        names = list(players)
+        if positions is None:
+            positions = list(next(iter(players.values()))) if players else []
+        ratings = [[players[name].get(position, 0) for position in positions] for name in names]
+        return cls(names, positions, ratings, num_teams, objective)
+
+    @property
+    def num_players(self):
+        return len(self.names)
+
+    def set_assignment(self, assignment):
+        self.assignment = np.asarray(assignment, dtype=np.intp).copy()
+        self.team_sums = np.zeros((self.num_teams, len(self.positions)))
+        np.add.at(self.team_sums, self.assignment, self.ratings)
+
+    def members(self, team):
+        return np.flatnonzero(self.assignment == team)
+
+    def swap(self, player1, player2):
+        team1, team2 = self.assignment[player1], self.assignment[player2]
+        diff = self.ratings[player2] - self.ratings[player1]
+        self.team_sums[team1] += diff
+        self.team_sums[team2] -= diff
+        self.assignment[player1], self.assignment[player2] = team2, team1
+
+    def move(self, players, new_teams):
+        # Send players[i] to new_teams[i]; team sizes may change
+        players, new_teams = np.atleast_1d(players), np.atleast_1d(new_teams)
+        ratings = self.ratings[players]
+        np.subtract.at(self.team_sums, self.assignment[players], ratings)
+        np.add.at(self.team_sums, new_teams, ratings)
+        self.assignment[players] = new_teams
+
+    def team_sizes(self):
+        return np.bincount(self.assignment, minlength=self.num_teams)
+
+    def team_balance(self, team):
+        sums = self.team_sums[team]
+        return sums.max() - sums.min()
+
+    def team_balances(self):
+        # Each team's own spread, the per-team part of intra_team_spread
+        return self.team_sums.max(axis=1) - self.team_sums.min(axis=1)
+
+    def balance_score(self):
+        return float(self.objective(self.team_sums))
+
+    def lower_bound(self):
+        # No split can score below this, whatever the assignment
+        return self.objective.lower_bound(self.ratings)
+
+    def upper_bound(self):
+        # No split can score above this, whatever the assignment
+        return self.objective.upper_bound(self.ratings)
+
+    def batch_team_sums(self, assignments):
+        return team_totals(assignments, self.ratings, self.num_teams)
+
+    def batch_balance_scores(self, assignments):
+        # Balance score of every assignment row in one pass
+        return self.objective(self.batch_team_sums(assignments))
+
+    def swap_deltas(self, players1, players2):
+        """Change in balance score if players1[k] and players2[k] swapped teams.
+
+        Only the two affected teams' running sums are touched, and the player
+        index arrays broadcast against each other, so passing a column and a
+        row scores the whole candidate swap matrix in one pass. Pairs on the
+        same team get inf.
+        """
+        team1 = self.assignment[players1]
+        team2 = self.assignment[players2]
+        diff = self.ratings[players2] - self.ratings[players1]
+        delta = self.objective.swap_deltas(self.team_sums, team1, team2, diff)
+        return np.where(team1 == team2, np.inf, delta)
+
+    def move_deltas(self, players, new_teams):
+        """Change in balance score for each candidate move.
+
+        players and new_teams are (..., m): a candidate sends players[..., i]
+        to new_teams[..., i], all at once, so single-player moves, 2-for-2
+        swaps and rotations across three teams are scored alike. The moved
+        players of a candidate must be distinct.
+        """
+        players, new_teams = np.asarray(players), np.asarray(new_teams)
+        teams, diffs, _ = move_changes(self.assignment[players], new_teams, self.ratings[players])
+        return self.objective.change_deltas(self.team_sums, teams, diffs)
+
+    def swap_delta(self, player1, player2):
+        return float(self.swap_deltas(player1, player2))
+
+    def to_teams(self, players, assignment=None):
+        # Convert back to the [{name: {position: rating}}] format used by TeamFormulator
+        if assignment is None:
+            assignment = self.assignment
+        teams = [{} for _ in range(self.num_teams)]
+        for name, team in zip(self.names, assignment):
+            teams[team][name] = players[name]
+        return teams
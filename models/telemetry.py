@@ -0,0 +1,99 @@
+import time
+
+
+class SolverTelemetry:
+    """Counters and a best-so-far trajectory for one solver run.
+
+    Attach it with solver.set_telemetry(telemetry) before run(). Solvers
+    without telemetry skip every hook behind a single `is None` check, so
+    the cost when disabled is one comparison per iteration.
+
+    Counters:
+        iterations   main-loop iterations (generations for the genetic algorithm)
+        evaluated    candidate swaps or individuals scored one at a time
+        scored       candidates scored in bulk, e.g. epsilon-greedy's exploit step
+        rejected     candidates that broke a roster constraint
+        accepted     candidates that replaced the current split
+
+    timings holds the seconds spent in each phase of the main loop, for
+    finding hot spots: select (picking a candidate, plus the loop's own
+    bookkeeping), evaluate (scoring it) and apply (changing the split).
+    Solvers that pick and score in one vectorized pass, such as LeagueSearch
+    and BatchSearch, count that pass as evaluate. The solver calls lap(phase)
+    after each phase, behind the same `is None` check as record.
+
+    trajectory holds (iteration, seconds, best score) at every improvement.
+    When `every` is set, callback(telemetry) is called every `every`
+    iterations, e.g. to draw a progress bar or a convergence curve.
+    on_improve(telemetry), when given, is called at every improvement.
+    """
+
+    PHASES = ("select", "evaluate", "apply")
+
+    def __init__(self, every=None, callback=None, on_improve=None):
+        if every and callback is None:
+            raise ValueError("SolverTelemetry(every=...) needs a callback")
+        self.every = every
+        self.callback = callback
+        self.on_improve = on_improve
+        self.start()
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.iterations = 0
+        self.evaluated = 0
+        self.scored = 0
+        self.rejected = 0
+        self.accepted = 0
+        self.best = float("inf")
+        self.trajectory = []
+        self.timings = dict.fromkeys(self.PHASES, 0.0)
+        self.lap_started = self.started
+        return self
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def evaluations(self):
+        return self.evaluated + self.scored
+
+    @property
+    def acceptance_rate(self):
+        return self.accepted / self.evaluated if self.evaluated else 0.0
+
+    def lap(self, phase):
+        # Add the time since the previous lap to the phase's total
+        now = time.perf_counter()
+        self.timings[phase] += now - self.lap_started
+        self.lap_started = now
+
+    def record(self, best, evaluated=1, rejected=0, accepted=0):
+        # Called once per main-loop iteration
+        self.iterations += 1
+        self.evaluated += evaluated
+        self.rejected += rejected
+        self.accepted += accepted
+        if best < self.best:
+            self.best = best
+            self.trajectory.append((self.iterations, self.elapsed(), float(best)))
+            if self.on_improve is not None:
+                self.on_improve(self)
+        if self.every and self.iterations % self.every == 0:
+            self.callback(self)
+
+    def summary(self):
+        elapsed = self.elapsed()
+        return {
+            "iterations": self.iterations,
+            "evaluated": self.evaluated,
+            "scored": self.scored,
+            "rejected": self.rejected,
+            "accepted": self.accepted,
+            "acceptance_rate": self.acceptance_rate,
+            "evaluations_per_second": self.evaluations / elapsed if elapsed > 0 else None,
+            "seconds": elapsed,
+            "best": self.best,
+            "timings": dict(self.timings),
+            "trajectory": list(self.trajectory),
+        }
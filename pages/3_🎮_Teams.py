@@ -1,53 +1,40 @@
 import streamlit as st
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from db.entities import (
-    Base,
-    Player,
-    Position,
-    Rating,
-)  # Assume these are the same models from previous discussions
-import json
-from models.bandits import EpsilonGreedy, UCB, ThompsonSampling
+from sqlalchemy import func
+from db.entities import RatingAggregate
+from db.queries import get_latest_match_split, get_position_names, get_rating_matrix
+from db.session import session_scope
+import threading
+import time
 from models.base import TeamFormulator
+from models.cache import SolutionCache
+from models.exact import BranchAndBound
+from models.initializers import SnakeDraft, WarmStart
 
 st.set_page_config(page_title="Teams", page_icon="🎮", layout="wide")
 
-
-# Database connection
-engine = create_engine("sqlite:///rating.db")
-Session = sessionmaker(bind=engine)
-session = Session()
+# Seconds the solver may search before the best split so far is final
+SEARCH_TIME_LIMIT = 2.0
 
 
 def get_all_players_ratings():
-    # Query all players
-    players = session.query(Player).all()
-    # Query all positions once to optimize
-    positions = session.query(Position).all()
-    position_names = [
-        pos.name.lower() for pos in positions
-    ]  # Convert position names to lowercase
-
-    player_ratings = {}
-    for player in players:
-        ratings = {
-            pos: [] for pos in position_names
-        }  # Initialize ratings for each position in lowercase
-        for rating in player.ratings:
-            position_name = (
-                rating.position.name.lower()
-            )  # Ensure position name is in lowercase
-            ratings[position_name].append(rating.score)
-
-        # Compute average or zero if no ratings
-        averaged_ratings = {
-            pos: sum(scores) / len(scores) if scores else 0
-            for pos, scores in ratings.items()
-        }
-        player_ratings[player.name] = averaged_ratings
-
-    return player_ratings
+    # Averages come from the rating aggregates; see db.aggregates
+    player_names, position_names, averages = get_rating_matrix(session)
+    position_names = [name.lower() for name in position_names]  # Lowercase, in table order
+    return {
+        name: dict(zip(position_names, map(float, row)))
+        for name, row in zip(player_names, averages)
+    }
+
+
+@st.cache_resource
+def get_solution_cache():
+    # One cache per server process, shared by every session
+    return SolutionCache(max_entries=32)
+
+
+def get_ratings_version():
+    # Changes whenever ratings are submitted or the aggregates are rebuilt
+    return tuple(session.query(func.sum(RatingAggregate.count), func.max(RatingAggregate.last_updated)).one())
 
 
 def print_teams_as_table(results):
@@ -86,7 +73,15 @@ def print_teams_as_table(results):
     st.markdown(markdown_table)
 
 
+def stop_running_search():
+    # A rerun interrupts the script but not the solver thread it started
+    cancel = st.session_state.pop("search_cancel", None)
+    if cancel is not None:
+        cancel.set()
+
+
 def app():
+    stop_running_search()
     st.title("Player Ratings Overview")
 
     # Fetch all player ratings
@@ -112,18 +107,49 @@ def app():
         if selected_players:
             selected_ratings = {player: all_player_ratings[player] for player in selected_players}
 
-            formulator = TeamFormulator(selected_ratings)
-            epsilon_greedy = EpsilonGreedy(
-                selected_ratings, iterations=1000, epsilon=0.1, num_teams=num_teams
+            # Reuse the last split for the same roster, ratings and settings
+            cache = get_solution_cache()
+            cache.sync(get_ratings_version())
+            formulator = TeamFormulator(selected_ratings, cache=cache, positions=get_position_names(session))
+            # Start from the last match's teams when there is one, otherwise from a snake draft
+            previous = get_latest_match_split(session)
+            initializer = WarmStart(previous) if previous else SnakeDraft()
+            # The tuned solver for this roster size and team count (see tune.py) runs in this process,
+            # so each improvement can be shown as it is found
+            heuristic = formulator.choose_algorithm(num_teams, initializer=initializer)
+            # Solve exactly when the roster is small enough, otherwise fall back to the tuned solver
+            solver = BranchAndBound(
+                selected_ratings, num_teams=num_teams, fallback=heuristic, positions=formulator.positions
             )
 
-            # Formulate teams using the epsilon-greedy algorithm
-            results = formulator.formulate_teams(epsilon_greedy)
-
-            # Print teams as a markdown table
-            print_teams_as_table(results)
+            # The solver runs on a background thread; the Stop button reruns the page, which cancels it
+            cancel = threading.Event()
+            st.session_state["search_cancel"] = cancel
+            st.button("Stop")
+            progress = st.progress(0.0, text="Searching...")
+            table = st.empty()
+            started = time.perf_counter()
+            try:
+                # Stop at the time limit or once 200 iterations pass without improvement
+                for results in formulator.iter_solutions(
+                    solver, time_limit=SEARCH_TIME_LIMIT, stagnation_limit=200, cancel=cancel, timeout=0.1
+                ):
+                    if results is not None:
+                        st.session_state["team_results"] = results
+                        with table.container():
+                            # Print teams as a markdown table
+                            print_teams_as_table(results)
+                    elapsed = time.perf_counter() - started
+                    progress.progress(min(elapsed / SEARCH_TIME_LIMIT, 1.0), text="Searching...")
+            finally:
+                cancel.set()
+            progress.progress(1.0, text="Done")
         else:
             st.write("No players selected.")
+    elif "team_results" in st.session_state:
+        # Keep showing the last split, e.g. after the search was stopped
+        print_teams_as_table(st.session_state["team_results"])
 
 
-app()
+with session_scope() as session:
+    app()
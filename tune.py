@@ -0,0 +1,132 @@
+"""Tune the solver choice and its hyperparameters per roster-size / team-count bucket.
+
+Usage:
+    python tune.py                                      # default grid, profiles in data/solver_profiles.json
+    python tune.py --sizes 12 24 --teams 2 3 --seeds 3 --output profiles.json
+
+Every configuration in SEARCH_SPACE (solver, parameters, iteration count)
+runs on the same benchmark rosters: one per rating distribution and seed.
+On each roster, a configuration's gap is how far its balance score is from
+the best score any configuration reached there, relative to that score
+(counted as at least 1 rating point). Seconds and gap are averaged over the
+bucket's rosters, and only the configurations on the speed/quality front
+are stored; TeamFormulator.choose_algorithm picks among them.
+
+Runs don't stop at the roster's lower bound: on these rosters most
+configurations reach it within a few iterations, and the timings would
+only measure that luck. Every configuration spends its whole iteration
+count, which is also the cap SolverProfiles.build gives it.
+"""
+
+import argparse
+import itertools
+import platform
+import random
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmark import DISTRIBUTIONS, balance_score, make_roster
+from models.budget import SearchBudget
+from models.profiles import PROFILES_PATH, SolverProfiles
+
+SEARCH_SPACE = {
+    "EpsilonGreedy": {"epsilon": [0.05, 0.1, 0.2, 0.3]},
+    "UCB": {"exploration_factor": [0.5, 1.0, 2.0]},
+    "ThompsonSampling": {"alpha": [1, 2], "beta": [1, 2]},
+    "GeneticAlgorithm": {"population_size": [20, 50, 100], "mutation_rate": [0.05, 0.1, 0.2]},
+}
+
+ITERATIONS = [100, 300, 1000]
+
+
+def configurations(solvers, iterations):
+    for solver in solvers:
+        grid = SEARCH_SPACE[solver]
+        for values in itertools.product(*grid.values()):
+            for count in iterations:
+                yield {"solver": solver, "params": dict(zip(grid, values)), "iterations": count}
+
+
+def run_config(config, players, num_teams, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    algorithm = SolverProfiles.build(config, players, num_teams)
+    algorithm.set_budget(stop_at_bound=False)
+    started = time.perf_counter()
+    teams = algorithm.run()
+    return time.perf_counter() - started, balance_score(players, teams)
+
+
+def speed_quality_front(results):
+    # Fastest first; a slower configuration is only kept when it is also more accurate
+    front = []
+    for result in sorted(results, key=lambda result: (result["seconds"], result["gap"])):
+        if not front or result["gap"] < front[-1]["gap"]:
+            front.append(result)
+    return front
+
+
+def tune(sizes, teams, distributions, seeds, solvers, iterations):
+    configs = list(configurations(solvers, iterations))
+    buckets = []
+    for num_players in sizes:
+        for num_teams in teams:
+            if num_teams * 2 > num_players:
+                # Every team needs at least two players for a swap to exist
+                continue
+            rosters = [
+                make_roster(num_players, distribution, seed) for distribution in distributions for seed in range(seeds)
+            ]
+            seconds = np.zeros((len(configs), len(rosters)))
+            scores = np.zeros((len(configs), len(rosters)))
+            for j, players in enumerate(rosters):
+                for i, config in enumerate(configs):
+                    seconds[i, j], scores[i, j] = run_config(config, players, num_teams, seed=j)
+
+            # Differences below the tolerance are rounding noise in the rating averages
+            behind = scores - scores.min(axis=0)
+            behind[behind < SearchBudget.TOLERANCE] = 0
+            gaps = (behind / np.maximum(scores.min(axis=0), 1.0)).mean(axis=1)
+            results = [
+                {**config, "seconds": float(seconds[i].mean()), "gap": float(gaps[i])}
+                for i, config in enumerate(configs)
+            ]
+            front = speed_quality_front(results)
+            buckets.append({"max_players": num_players, "num_teams": num_teams, "configs": front})
+            fastest, most_accurate = front[0], front[-1]
+            print(
+                f"n<={num_players:<5} k={num_teams:<3} {len(front)} on the front, "
+                f"fastest {fastest['solver']} {fastest['seconds']:.3f}s gap={fastest['gap']:.3f}, "
+                f"most accurate {most_accurate['solver']} {most_accurate['seconds']:.3f}s "
+                f"gap={most_accurate['gap']:.3f}"
+            )
+    return SolverProfiles(buckets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 16, 24, 32, 50])
+    parser.add_argument("--teams", type=int, nargs="+", default=[2, 3, 4])
+    parser.add_argument("--distributions", nargs="+", choices=DISTRIBUTIONS, default=DISTRIBUTIONS)
+    parser.add_argument("--seeds", type=int, default=2, help="rosters per distribution and bucket")
+    parser.add_argument("--solvers", nargs="+", choices=list(SEARCH_SPACE), default=list(SEARCH_SPACE))
+    parser.add_argument("--iterations", type=int, nargs="+", default=ITERATIONS)
+    parser.add_argument("--output", default=PROFILES_PATH)
+    args = parser.parse_args()
+
+    profiles = tune(args.sizes, args.teams, args.distributions, args.seeds, args.solvers, args.iterations)
+    profiles.save(
+        args.output,
+        created=datetime.now(timezone.utc).isoformat(),
+        python=platform.python_version(),
+        numpy=np.__version__,
+        machine=platform.platform(),
+        settings={key: value for key, value in vars(args).items() if key != "output"},
+    )
+    print(f"Wrote {len(profiles.buckets)} buckets to {args.output}")
+
+
+if __name__ == "__main__":
+    main()